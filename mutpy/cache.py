@@ -0,0 +1,123 @@
+import ast
+import contextlib
+import gc
+import hashlib
+import os
+import pickle
+import sys
+from mutpy import utils
+
+SCOPE_NODES = tuple(getattr(ast, name) for name in ['FunctionDef', 'AsyncFunctionDef', 'ClassDef']
+                    if hasattr(ast, name))
+
+
+def get_source_hash(source):
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+@contextlib.contextmanager
+def gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def get_mutation_scope(mutation, mutant_ast):
+    node = getattr(mutation.node, 'parent', None)
+    while node is not None and not isinstance(node, SCOPE_NODES):
+        node = getattr(node, 'parent', None)
+    return node or mutant_ast
+
+
+def get_scope_qualname(scope):
+    names = []
+    while scope is not None:
+        if isinstance(scope, SCOPE_NODES):
+            names.append(scope.name)
+        scope = getattr(scope, 'parent', None)
+    return '.'.join(reversed(names))
+
+
+def get_mutant_key(module_name, mutant_ast, mutations, tests):
+    key = [sys.version, module_name, tests]
+    for mutation in mutations:
+        scope = get_mutation_scope(mutation, mutant_ast)
+        key.append((mutation.operator.name(), mutation.visitor, get_scope_qualname(scope), ast.dump(scope)))
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+class ResultsCache:
+    FILE_NAME = 'results.pickle'
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.file_name = os.path.join(cache_dir, self.FILE_NAME)
+        self.results = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.file_name, 'rb') as cache_file:
+                self.results = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.results = {}
+
+    def save(self):
+        temp_file_name = self.file_name + '.tmp'
+        with open(temp_file_name, 'wb') as cache_file:
+            pickle.dump(self.results, cache_file)
+        os.replace(temp_file_name, self.file_name)
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def set(self, key, result, duration):
+        try:
+            pickle.dumps(result)
+        except Exception:
+            result = result._replace(exception=None)
+        self.results[key] = (result, duration)
+
+
+class ASTCache:
+    DIR_NAME = 'ast'
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir):
+        self.cache_dir = os.path.join(cache_dir, self.DIR_NAME)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_file_name(self, source):
+        key = hashlib.sha1(repr((sys.version, self.FORMAT_VERSION, source)).encode()).hexdigest()
+        return os.path.join(self.cache_dir, key + '.pickle')
+
+    def get(self, source):
+        try:
+            with open(self.get_file_name(source), 'rb') as cache_file, gc_paused():
+                return pickle.load(cache_file)
+        except (OSError, EOFError, AttributeError, pickle.UnpicklingError):
+            return None
+
+    def set(self, source, target_ast):
+        file_name = self.get_file_name(source)
+        temp_file_name = '{}.{}.tmp'.format(file_name, os.getpid())
+        try:
+            with open(temp_file_name, 'wb') as cache_file:
+                pickle.dump(target_ast, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file_name, file_name)
+        except (OSError, RecursionError, pickle.PicklingError):
+            with contextlib.suppress(OSError):
+                os.remove(temp_file_name)
+
+    def create_ast(self, source):
+        target_ast = self.get(source)
+        if target_ast is None:
+            with gc_paused():
+                target_ast = utils.create_ast(source)
+            self.set(source, target_ast)
+        return target_ast
@@ -1,17 +1,23 @@
 import argparse
+import os
+import subprocess
 import sys
-from mutpy import controller, views, operators, utils
+import yaml
+from mutpy import controller, views, operators, utils, distributed, cache, sharding
 
 VERSION = '0.3.2'
 
 
 def main(argv):
-    parser = build_parser()
-    run_mutpy(parser)
+    if argv[1:2] == ['merge']:
+        run_merge(build_merge_parser(), argv[2:])
+    else:
+        run_mutpy(build_parser())
 
 
 def build_parser():
     DEF_TIMEOUT_FACTOR = 5
+    DEF_COORDINATOR_ADDRESS = 'localhost:7777'
     parser = argparse.ArgumentParser(description='Mutation testing tool for Python 3.x source code. ',
                                      fromfile_prefix_chars='@')
     parser.add_argument('--version', '-v', action='version', version='%(prog)s {}'.format(VERSION))
@@ -38,14 +44,66 @@ def build_parser():
     parser.add_argument('--path', '-p', type=str, metavar='DIR', help='extend Python path')
     parser.add_argument('--percentage', type=int, metavar='PERCENTAGE', default=100,
                         help='percentage of the generated mutants (mutation sampling)')
+    parser.add_argument('--max-mutants', type=int, metavar='MAX_MUTANTS',
+                        help='maximal number of mutants sampled from all target modules')
+    parser.add_argument('--seed', type=int, metavar='SEED', default=0,
+                        help='seed of the mutation sampling and random HOM strategy (default 0)')
     parser.add_argument('--coverage', action='store_true',
                         help='mutate only covered code')
+    parser.add_argument('--trace-coverage', action='store_true',
+                        help='measure coverage with line events of interpreter instead of injected code')
     parser.add_argument('--order', type=int, metavar='ORDER', default=1, help='mutation order')
     parser.add_argument('--hom-strategy', type=str, metavar='HOM_STRATEGY', help='HOM strategy',
                         default='FIRST_TO_LAST')
     parser.add_argument('--list-hom-strategies', action='store_true', help='list available HOM strategies')
     parser.add_argument('--mutation-number', type=int, metavar='MUTATION_NUMBER',
                         help='run only one mutation (debug purpose)')
+    parser.add_argument('--mutation-id', type=str, metavar='MUTATION_ID',
+                        help='run only mutation with this id from report (debug purpose)')
+    parser.add_argument('--runner', type=str, choices=['process', 'pool', 'forkserver'], default='process',
+                        help='run each mutant in a new process, in a persistent pool of worker processes or in a '
+                        'process forked from a snapshot taken after the baseline run (default process)')
+    parser.add_argument('--jobs', '-j', type=int, metavar='JOBS', default=1,
+                        help='number of mutants executed in parallel (default 1)')
+    parser.add_argument('--coordinator', type=str, nargs='?', const=DEF_COORDINATOR_ADDRESS, metavar='HOST:PORT',
+                        help='distribute mutants to workers connected to this address '
+                        '(default {})'.format(DEF_COORDINATOR_ADDRESS))
+    parser.add_argument('--worker', type=str, metavar='HOST:PORT',
+                        help='run mutants received from the coordinator at this address')
+    parser.add_argument('--authkey', type=str,
+                        help='key used to authenticate coordinator and workers connections, required by workers of '
+                        'a non-loopback coordinator (default generated and printed by such coordinator)')
+    parser.add_argument('--disable-test-prioritization', action='store_true',
+                        help='run tests in loader order instead of most likely killers and cheapest tests first')
+    parser.add_argument('--kill-history', type=str, metavar='HISTORY_FILE',
+                        help='load and save killing tests history used by tests prioritization')
+    parser.add_argument('--cache-dir', type=str, metavar='DIR',
+                        help='reuse results of unchanged mutants and parsed target modules from previous runs stored '
+                        'in this directory (a mutant is unchanged if its enclosing function and tests are unchanged, '
+                        'changes in functions it calls are not detected)')
+    parser.add_argument('--since', type=str, metavar='REF',
+                        help='mutate only lines changed since git REF or in unified diff file REF')
+    parser.add_argument('--schemata', action='store_true',
+                        help='compile all mutants of module into one meta-module and switch between them')
+    parser.add_argument('--hot-patch', action='store_true',
+                        help='replace code of mutated function in loaded module instead of executing whole mutant')
+    parser.add_argument('--sufficient-set', action='store_true',
+                        help='replace ROR and LCR mutants with sufficient (subsuming) set of all relational and '
+                        'logical replacements for each site, other operators (e.g. AOR) are not changed and the set '
+                        'can be larger than default ROR and LCR mutants')
+    parser.add_argument('--tce', action='store_true',
+                        help='skip mutants compiled to the same code as original or already executed mutant')
+    parser.add_argument('--shard', type=str, metavar='INDEX/COUNT',
+                        help='run only INDEX-th of COUNT cost-balanced parts of mutants (e.g. 1/4)')
+    parser.add_argument('--shard-timings', type=str, metavar='TIMINGS_FILE',
+                        help='YAML file mapping test ids to durations in seconds used to balance shards')
+    return parser
+
+
+def build_merge_parser():
+    parser = argparse.ArgumentParser(prog='mut.py merge', description='Merge YAML reports of MutPy shards.')
+    parser.add_argument('reports', type=str, nargs='+', help='YAML reports to merge', metavar='REPORT_FILE')
+    parser.add_argument('--report', '-r', type=str, help='save merged YAML report', metavar='REPORT_FILE')
     return parser
 
 
@@ -55,6 +113,13 @@ def run_mutpy(parser):
         list_operators()
     elif cfg.list_hom_strategies:
         list_hom_strategies()
+    elif cfg.worker and cfg.unit_test:
+        address = distributed.parse_address(cfg.worker)
+        if not cfg.authkey and not distributed.is_loopback(address):
+            print('Worker of non-loopback coordinator {} requires --authkey.'.format(cfg.worker))
+            sys.exit(-1)
+        mutation_controller = build_controller(cfg)
+        mutation_controller.run_worker(address, authkey=cfg.authkey)
     elif cfg.target and cfg.unit_test:
         mutation_controller = build_controller(cfg)
         mutation_controller.run()
@@ -62,11 +127,74 @@ def run_mutpy(parser):
         parser.print_usage()
 
 
+def run_merge(parser, argv):
+    cfg = parser.parse_args(argv)
+    reports = []
+    for file_name in cfg.reports:
+        with open(file_name) as report_file:
+            reports.append(yaml.safe_load(report_file))
+    score = controller.MutationScore()
+    try:
+        report = sharding.merge_reports(reports, score)
+    except ValueError as error:
+        print('Can\'t merge reports: {}.'.format(error))
+        sys.exit(-1)
+    if cfg.report:
+        with open(cfg.report, 'w') as report_file:
+            yaml.dump(report, report_file, default_flow_style=False)
+    views.TextView().end(score, report['total_time'])
+
+
+def load_shard_timings(file_name):
+    if not file_name:
+        return None
+    try:
+        with open(file_name) as timings_file:
+            timings = yaml.safe_load(timings_file)
+    except (OSError, yaml.YAMLError) as error:
+        raise ValueError('cannot read timings: {}'.format(error))
+    if not isinstance(timings, dict) or not all(isinstance(duration, (int, float)) for duration in timings.values()):
+        raise ValueError('timings should map test ids to durations')
+    return timings
+
+
 def build_controller(cfg):
+    if cfg.jobs < 1:
+        print('Number of jobs should be > 0.')
+        sys.exit(-1)
+    shard = None
+    if cfg.shard:
+        try:
+            shard = sharding.parse_shard(cfg.shard, load_shard_timings(cfg.shard_timings))
+        except ValueError as error:
+            print('Wrong shard {}: {}.'.format(cfg.shard, error))
+            sys.exit(-1)
     built_views = build_views(cfg)
     mutant_generator = build_mutator(cfg)
-    target_loader = utils.ModulesLoader(cfg.target, cfg.path)
+    changes = None
+    if cfg.since:
+        try:
+            changes = utils.get_changes(cfg.since, cfg.path)
+        except (OSError, subprocess.CalledProcessError):
+            print('Can\'t read changes since {}.'.format(cfg.since))
+            sys.exit(-1)
+    target_loader = utils.ModulesLoader(cfg.target, cfg.path, changes)
     test_loader = utils.ModulesLoader(cfg.unit_test, cfg.path)
+    results_cache = None
+    ast_cache = None
+    kill_history_file = cfg.kill_history
+    if cfg.cache_dir:
+        results_cache = cache.ResultsCache(cfg.cache_dir)
+        ast_cache = cache.ASTCache(cfg.cache_dir)
+        kill_history_file = kill_history_file or os.path.join(cfg.cache_dir, 'kill_history.pickle')
+    coordinator = None
+    if cfg.coordinator:
+        address = distributed.parse_address(cfg.coordinator)
+        authkey = cfg.authkey
+        if not authkey and not distributed.is_loopback(address):
+            authkey = distributed.generate_authkey()
+            print('Coordinator authkey: {}'.format(authkey))
+        coordinator = distributed.Coordinator(address, authkey=authkey)
     return controller.MutationController(
         target_loader=target_loader,
         test_loader=test_loader,
@@ -74,8 +202,21 @@ def build_controller(cfg):
         mutant_generator=mutant_generator,
         timeout_factor=cfg.timeout_factor,
         disable_stdout=cfg.disable_stdout,
-        mutate_covered=cfg.coverage,
+        mutate_covered=cfg.coverage or cfg.trace_coverage,
+        trace_coverage=cfg.trace_coverage,
         mutation_number=cfg.mutation_number,
+        mutation_id=cfg.mutation_id,
+        runner=cfg.runner,
+        jobs=cfg.jobs,
+        coordinator=coordinator,
+        prioritize_tests=not cfg.disable_test_prioritization,
+        kill_history=controller.KillHistory(kill_history_file),
+        results_cache=results_cache,
+        ast_cache=ast_cache,
+        schemata=cfg.schemata,
+        hot_patch=cfg.hot_patch,
+        tce=cfg.tce,
+        shard=shard,
     )
 
 
@@ -96,11 +237,15 @@ def build_mutator(cfg):
     operators_set -= {get_operator(name, name_to_operator)
                       for name in cfg.disable_operator}
 
+    if cfg.sufficient_set:
+        operators_set = {operators.sufficient_operators.get(operator, operator) for operator in operators_set}
+
     if cfg.order == 1:
-        return controller.FirstOrderMutator(operators_set, cfg.percentage)
+        return controller.FirstOrderMutator(operators_set, cfg.percentage, cfg.max_mutants, cfg.seed)
     else:
         hom_strategy = build_hom_strategy(cfg)
-        return controller.HighOrderMutator(operators_set, cfg.percentage, hom_strategy=hom_strategy)
+        return controller.HighOrderMutator(operators_set, cfg.percentage, cfg.max_mutants, cfg.seed,
+                                           hom_strategy=hom_strategy)
 
 
 def build_hom_strategy(cfg):
@@ -109,10 +254,13 @@ def build_hom_strategy(cfg):
         sys.exit(-1)
     try:
         name_to_hom_strategy = {hom_strategy.name: hom_strategy for hom_strategy in controller.hom_strategies}
-        return name_to_hom_strategy[cfg.hom_strategy](order=cfg.order)
+        hom_strategy_class = name_to_hom_strategy[cfg.hom_strategy]
     except KeyError:
         print('Unsupported HOM strategy {}! Use --list-hom-strategies to show strategies.'.format(cfg.hom_strategy))
         sys.exit(-1)
+    if hom_strategy_class is controller.RandomHOMStrategy:
+        return hom_strategy_class(order=cfg.order, seed=cfg.seed)
+    return hom_strategy_class(order=cfg.order)
 
 
 def get_operator(name, name_to_operator):
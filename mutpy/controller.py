@@ -1,8 +1,18 @@
 from os import path
+import bisect
+import collections
+import hashlib
+import marshal
+import math
+import pickle
 import random
 import sys
 import unittest
-from mutpy import views, utils, coverage
+from mutpy import views, utils, codegen, coverage, distributed, cache, schemata, operators, equivalence, sampling, \
+    sharding
+
+
+EQUIVALENT = object()
 
 
 class TestsFailAtOriginal(Exception):
@@ -18,15 +28,21 @@ class MutationScore:
         self.timeout_mutants = 0
         self.incompetent_mutants = 0
         self.survived_mutants = 0
+        self.equivalent_mutants = 0
+        self.pruned_mutants = 0
+        self.population_mutants = 0
         self.covered_nodes = 0
         self.all_nodes = 0
+        self.modules_coverage = {}
+        self.killed_tests_run = 0
 
     def count(self):
-        bottom = self.all_mutants - self.incompetent_mutants
+        bottom = self.all_mutants - self.incompetent_mutants - self.equivalent_mutants
         return (((self.killed_mutants + self.timeout_mutants) / bottom) * 100) if bottom else 0
 
-    def inc_killed(self):
+    def inc_killed(self, tests_run=0):
         self.killed_mutants += 1
+        self.killed_tests_run += tests_run
 
     def inc_timeout(self):
         self.timeout_mutants += 1
@@ -37,19 +53,101 @@ class MutationScore:
     def inc_survived(self):
         self.survived_mutants += 1
 
-    def update_coverage(self, covered_nodes, all_nodes):
+    def inc_equivalent(self):
+        self.equivalent_mutants += 1
+
+    def inc_pruned(self, pruned_mutants):
+        self.pruned_mutants += pruned_mutants
+
+    def inc_population(self, population_mutants):
+        self.population_mutants += population_mutants
+
+    def confidence_interval(self, z=1.96):
+        sampled = self.all_mutants - self.incompetent_mutants - self.equivalent_mutants
+        if not sampled or self.population_mutants <= self.all_mutants:
+            return None
+        score = (self.killed_mutants + self.timeout_mutants) / sampled
+        effective_sampled = sampled / (1 - self.all_mutants / self.population_mutants)
+        denominator = 1 + z ** 2 / effective_sampled
+        center = (score + z ** 2 / (2 * effective_sampled)) / denominator
+        half_width = z * math.sqrt(score * (1 - score) / effective_sampled +
+                                   z ** 2 / (4 * effective_sampled ** 2)) / denominator
+        return max(0, center - half_width) * 100, min(1, center + half_width) * 100
+
+    def update_coverage(self, covered_nodes, all_nodes, module_name=None):
         self.covered_nodes += covered_nodes
         self.all_nodes += all_nodes
+        if module_name:
+            self.modules_coverage[module_name] = [covered_nodes, all_nodes]
+
+    def tests_run_per_killed(self):
+        return self.killed_tests_run / self.killed_mutants if self.killed_mutants else 0
 
     @property
     def all_mutants(self):
-        return self.killed_mutants + self.timeout_mutants + self.incompetent_mutants + self.survived_mutants
+        return self.killed_mutants + self.timeout_mutants + self.incompetent_mutants + self.survived_mutants + \
+            self.equivalent_mutants
+
+
+class KillHistory:
+
+    def __init__(self, file_name=None):
+        self.file_name = file_name
+        self.node_kills = collections.defaultdict(collections.Counter)
+        self.operator_kills = collections.defaultdict(collections.Counter)
+        self.pending_kills = collections.deque()
+        if file_name and path.exists(file_name):
+            self.load()
+
+    @staticmethod
+    def get_node_key(module_name, node):
+        return module_name, getattr(node, 'lineno', None), getattr(node, 'col_offset', None), node.__class__.__name__
+
+    def add_kill(self, module_name, mutations, test_id, mutation_number=None):
+        if mutation_number is not None:
+            self.pending_kills.append((mutation_number, module_name, mutations, test_id))
+            return
+        for mutation in mutations:
+            self.node_kills[self.get_node_key(module_name, mutation.node)][test_id] += 1
+            self.operator_kills[mutation.operator.name()][test_id] += 1
+
+    def apply_kills(self, mutation_number=None):
+        while self.pending_kills and (mutation_number is None or self.pending_kills[0][0] <= mutation_number):
+            _, module_name, mutations, test_id = self.pending_kills.popleft()
+            self.add_kill(module_name, mutations, test_id)
+
+    def sort_tests(self, test_ids, module_name, mutations, test_costs):
+        node_kills = collections.Counter()
+        operator_kills = collections.Counter()
+        for mutation in mutations:
+            node_kills.update(self.node_kills.get(self.get_node_key(module_name, mutation.node), {}))
+            operator_kills.update(self.operator_kills.get(mutation.operator.name(), {}))
+        return sorted(test_ids, key=lambda test_id: (
+            -node_kills[test_id],
+            -operator_kills[test_id],
+            test_costs.get(test_id, 0),
+        ))
+
+    def load(self):
+        with open(self.file_name, 'rb') as history_file:
+            self.node_kills, self.operator_kills = pickle.load(history_file)
+
+    def save(self):
+        self.apply_kills()
+        if self.file_name:
+            with open(self.file_name, 'wb') as history_file:
+                pickle.dump((self.node_kills, self.operator_kills), history_file)
 
 
 class MutationController(views.ViewNotifier):
+    MIN_TEST_DURATION = 0.1
+    TEST_COST_UNIT = 0.001
 
     def __init__(self, target_loader, test_loader, views, mutant_generator,
-                 timeout_factor=5, disable_stdout=False, mutate_covered=False, mutation_number=None):
+                 timeout_factor=5, disable_stdout=False, mutate_covered=False, mutation_number=None,
+                 runner='process', jobs=1, coordinator=None, prioritize_tests=True, kill_history=None,
+                 results_cache=None, schemata=False, hot_patch=False, mutation_id=None, tce=False, shard=None,
+                 ast_cache=None, trace_coverage=False):
         super().__init__(views)
         self.target_loader = target_loader
         self.test_loader = test_loader
@@ -57,7 +155,32 @@ class MutationController(views.ViewNotifier):
         self.timeout_factor = timeout_factor
         self.stdout_manager = utils.StdoutManager(disable_stdout)
         self.mutate_covered = mutate_covered
+        self.trace_coverage = trace_coverage
         self.mutation_number = mutation_number
+        self.mutation_id = mutation_id
+        self.runner = runner
+        self.jobs = jobs
+        self.coordinator = coordinator
+        self.prioritize_tests = prioritize_tests
+        self.kill_history = kill_history or KillHistory()
+        self.results_cache = results_cache
+        self.ast_cache = ast_cache
+        self.schemata = schemata
+        self.mutant_schema = None
+        self.schema_module = None
+        self.schema_module_key = None
+        self.hot_patch = hot_patch
+        self.function_patch = None
+        self.tce = tce
+        self.equivalence = None
+        self.equivalent_results = {}
+        self.shard = shard
+        self.target_modules = {}
+        self.tests_sources_hashes = {}
+        self.test_live_times = {}
+        self.test_costs = {}
+        self.loaded_tests = {}
+        self.tests_by_id = {}
 
     def run(self):
         self.notify_initialize(self.target_loader.names, self.test_loader.names)
@@ -81,10 +204,60 @@ class MutationController(views.ViewNotifier):
 
             self.score = MutationScore()
 
-            for target_module, to_mutate in self.target_loader.load([module for module, *_ in test_modules]):
+            target_modules = list(self.target_loader.load([module for module, *_ in test_modules]))
+            if self.mutant_generator.sampler.max_mutants is not None:
+                self.allocate_mutants_budget(target_modules, test_modules)
+            if self.shard:
+                self.plan_shard(target_modules, test_modules)
+                self.notify_shard(self.shard.index, self.shard.count, len(self.shard.mutants_ids),
+                                  len(self.shard.mutants_costs))
+            for target_module, to_mutate in target_modules:
                 self.mutate_module(target_module, to_mutate, test_modules)
         except KeyboardInterrupt:
             pass
+        finally:
+            self.kill_history.save()
+            if self.results_cache:
+                self.results_cache.save()
+            if self.coordinator:
+                self.coordinator.close()
+
+    def allocate_mutants_budget(self, target_modules, test_modules):
+        for target_module, to_mutate in target_modules:
+            target_ast = self.create_target_ast(target_module)
+            coverage_injector, _ = self.inject_coverage(target_ast, target_module, test_modules)
+            self.mutant_generator.add_population(target_ast, to_mutate, target_module, coverage_injector)
+            self.repair_tests_modules(target_module, test_modules)
+        self.mutant_generator.sampler.allocate()
+
+    def plan_shard(self, target_modules, test_modules):
+        tests_weights = self.shard.tests_weights
+        all_test_ids = sorted(self.tests_by_id)
+        for target_module, to_mutate in target_modules:
+            target_ast = self.create_target_ast(target_module)
+            coverage_injector, coverage_result = self.inject_coverage(target_ast, target_module, test_modules)
+            mutants = self.mutant_generator.list_mutants(target_ast, to_mutate, coverage_injector, target_module)
+            for mutations in self.mutant_generator.select_mutants(mutants, target_module):
+                if coverage_result:
+                    test_ids = coverage_result.get_covering_tests({mutation.node.marker for mutation in mutations})
+                else:
+                    test_ids = all_test_ids
+                self.shard.add_mutant(target_module.__name__, mutations,
+                                      sharding.get_mutant_cost(test_ids, tests_weights))
+            self.repair_tests_modules(target_module, test_modules)
+        self.shard.plan()
+
+    def run_worker(self, address, authkey=None):
+        try:
+            test_modules, _ = self.load_and_check_tests()
+        except TestsFailAtOriginal as error:
+            self.notify_original_tests_fail(error.result)
+            sys.exit(-1)
+        worker = distributed.Worker(address, self.create_local_worker_pool(test_modules), authkey=authkey)
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            pass
 
     def load_and_check_tests(self):
         test_modules = []
@@ -100,11 +273,14 @@ class MutationController(views.ViewNotifier):
         return test_modules, number_of_tests
 
     def run_test(self, test_module, target_test):
-        suite = self.get_test_suite(test_module, target_test)
-        result = unittest.TestResult()
+        suite = unittest.TestSuite(utils.copy_test(test) for test in self.get_tests(test_module, target_test))
+        result = utils.TimedTestResult()
         timer = utils.Timer()
         with self.stdout_manager:
             suite.run(result)
+        for test_id, duration in result.durations.items():
+            self.test_live_times[test_id] = self.get_test_live_time(duration)
+            self.test_costs[test_id] = self.get_test_cost(duration)
         return result, timer.stop()
 
     def get_test_suite(self, test_module, target_test):
@@ -113,28 +289,108 @@ class MutationController(views.ViewNotifier):
         else:
             return unittest.TestLoader().loadTestsFromModule(test_module)
 
+    def get_tests(self, test_module, target_test):
+        key = (test_module.__name__, target_test)
+        if key not in self.loaded_tests:
+            tests = list(utils.iter_tests(self.get_test_suite(test_module, target_test)))
+            for test in tests:
+                self.tests_by_id.setdefault(test.id(), test)
+            self.loaded_tests[key] = tests
+        return self.loaded_tests[key]
+
     @utils.TimeRegister
     def mutate_module(self, target_module, to_mutate, test_modules):
         target_ast = self.create_target_ast(target_module)
+        self.target_modules[target_module.__name__] = target_module
+        pruned_mutants = self.mutant_generator.pruned_mutants
+        population_mutants = self.mutant_generator.population_mutants - self.get_skipped_mutants()
         coverage_injector, coverage_result = self.inject_coverage(target_ast, target_module, test_modules)
 
         if coverage_injector:
-            self.score.update_coverage(*coverage_injector.get_result())
+            self.score.update_coverage(*coverage_injector.get_result(), module_name=target_module.__name__)
+
+        mutants = self.mutant_generator.mutate(target_ast, to_mutate, coverage_injector, module=target_module)
+        if self.shard:
+            mutants = self.shard.filter(target_module.__name__, mutants)
+        if self.schemata:
+            self.mutant_schema = schemata.MutantSchema(target_ast, target_module.__name__)
+            mutants = self.mutant_schema.mutate(mutants)
+        if self.tce:
+            self.equivalence = equivalence.TrivialCompilerEquivalence(target_ast, target_module.__name__)
+        worker_pool = self.create_worker_pool(test_modules)
+        if worker_pool:
+            try:
+                self.run_mutants_in_pool(worker_pool, mutants, target_module, test_modules, coverage_result)
+            finally:
+                if worker_pool is not self.coordinator:
+                    worker_pool.close()
+        else:
+            for mutations, mutant_ast in mutants:
+                mutation_number = self.score.all_mutants + 1
+                if not self.is_mutant_selected(mutation_number, target_module.__name__, mutations):
+                    self.score.inc_incompetent()
+                    continue
+                self.notify_mutation(mutation_number, mutations, target_module.__name__, mutant_ast)
+                equivalence_key = self.get_equivalence_key(mutant_ast, mutations)
+                if equivalence_key is EQUIVALENT:
+                    self.update_equivalent_mutant()
+                    continue
+                test_ids = self.get_mutant_test_ids(target_module.__name__, mutations, coverage_result)
+                cache_key = self.get_cache_key(target_module, mutant_ast, mutations, test_ids, test_modules)
+                cached_result = self.get_cached_result(cache_key) or self.equivalent_results.get(equivalence_key)
+                if cached_result:
+                    self.update_mutant_result(target_module.__name__, mutations, cache_key, *cached_result)
+                    continue
+                try:
+                    mutant_module = self.create_mutant_module(target_module, mutant_ast, mutations)
+                    if mutant_module:
+                        self.run_tests_with_mutant(test_modules, mutant_module, mutations, test_ids, cache_key,
+                                                   equivalence_key)
+                    else:
+                        self.score.inc_incompetent()
+                finally:
+                    self.restore_function_patch()
+
+        self.mutant_schema = None
+        self.equivalence = None
+        self.equivalent_results = {}
+        self.score.inc_pruned(self.mutant_generator.pruned_mutants - pruned_mutants)
+        self.score.inc_population(self.mutant_generator.population_mutants - self.get_skipped_mutants() -
+                                  population_mutants)
+        self.repair_tests_modules(target_module, test_modules)
 
-        for mutations, mutant_ast in self.mutant_generator.mutate(target_ast, to_mutate, coverage_injector,
-                                                                  module=target_module):
-            mutation_number = self.score.all_mutants + 1
-            if self.mutation_number and self.mutation_number != mutation_number:
-                self.score.inc_incompetent()
-                continue
-            self.notify_mutation(mutation_number, mutations, target_module.__name__, mutant_ast)
-            mutant_module = self.create_mutant_module(target_module, mutant_ast)
-            if mutant_module:
-                self.run_tests_with_mutant(test_modules, mutant_module, mutations, coverage_result)
-            else:
-                self.score.inc_incompetent()
+    def get_skipped_mutants(self):
+        return self.shard.skipped_mutants if self.shard else 0
 
-        self.repair_tests_modules(target_module, test_modules)
+    def is_mutant_selected(self, mutation_number, module_name, mutations):
+        if self.mutation_number and self.mutation_number != mutation_number:
+            return False
+        if self.mutation_id and self.mutation_id != operators.get_mutations_id(module_name, mutations):
+            return False
+        return True
+
+    def get_equivalence_key(self, mutant_ast, mutations):
+        if not self.equivalence:
+            return None
+        original_key, mutant_key = self.equivalence.get_keys(mutant_ast, mutations)
+        if mutant_key is not None and mutant_key == original_key:
+            return EQUIVALENT
+        return mutant_key
+
+    def create_worker_pool(self, test_modules):
+        if self.coordinator:
+            return self.coordinator
+        if self.runner == 'process' and self.jobs == 1:
+            return None
+        return self.create_local_worker_pool(test_modules)
+
+    def create_local_worker_pool(self, test_modules):
+        return utils.MutationTestWorkerPool(
+            handler=lambda task: self.run_mutation_task(task, test_modules),
+            size=self.jobs,
+            max_tasks=1 if self.runner == 'process' else None,
+            worker_class=utils.ForkServerWorker if self.runner == 'forkserver' else utils.MutationTestWorker,
+        )
 
     def repair_tests_modules(self, target_module, test_modules):
         for module, _, _ in test_modules:
@@ -144,7 +400,10 @@ class MutationController(views.ViewNotifier):
     def inject_coverage(self, target_ast, target_module, test_modules):
         if not self.mutate_covered:
             return None, None
-        coverage_injector = coverage.CoverageInjector()
+        if self.trace_coverage:
+            coverage_injector = coverage.CoverageTracer(target_module)
+        else:
+            coverage_injector = coverage.CoverageInjector()
         coverage_module = coverage_injector.inject(target_ast, target_module.__name__)
         suite, total_duration = self.create_test_suite(test_modules, coverage_module)
         coverage_result = coverage.CoverageTestResult(coverage_injector=coverage_injector)
@@ -154,13 +413,29 @@ class MutationController(views.ViewNotifier):
 
     @utils.TimeRegister
     def create_target_ast(self, target_module):
-        with open(target_module.__file__) as target_file:
-            return utils.create_ast(target_file.read())
+        source = self.get_module_source(target_module)
+        if self.ast_cache:
+            return self.ast_cache.create_ast(source)
+        return utils.create_ast(source)
+
+    def get_module_source(self, module):
+        with open(module.__file__) as module_file:
+            return module_file.read()
 
     @utils.TimeRegister
-    def create_mutant_module(self, target_module, mutant_ast):
+    def create_mutant_module(self, target_module, mutant_ast, mutations=()):
         try:
             with self.stdout_manager:
+                if self.mutant_schema and self.mutant_schema.mutant_id:
+                    return self.get_schema_module(
+                        target_module.__name__,
+                        self.mutant_schema.code,
+                        self.mutant_schema.mutant_id,
+                    )
+                function_patch = self.create_function_patch(target_module, mutations)
+                if function_patch:
+                    self.function_patch = function_patch
+                    return function_patch.apply(target_module)
                 return utils.create_module(
                     ast_node=mutant_ast,
                     module_name=target_module.__name__
@@ -169,58 +444,233 @@ class MutationController(views.ViewNotifier):
             self.notify_incompetent(exception, tests_run=0)
             return None
 
-    def create_test_suite(self, tests_modules, mutant_module):
-        suite = unittest.TestSuite()
+    def create_function_patch(self, target_module, mutations):
+        if not self.hot_patch or self.coordinator:
+            return None
+        return utils.FunctionPatch.create(target_module, mutations)
+
+    def restore_function_patch(self):
+        if self.function_patch:
+            self.function_patch.restore()
+            self.function_patch = None
+
+    def get_schema_module(self, module_name, code, mutant_id=0):
+        key = (module_name, hashlib.sha1(code).digest())
+        if self.schema_module_key != key:
+            self.schema_module = utils.create_module_from_code(
+                marshal.loads(code),
+                module_name,
+                {schemata.ACTIVE_MUTANT_NAME: 0},
+            )
+            self.schema_module_key = key
+        setattr(self.schema_module, schemata.ACTIVE_MUTANT_NAME, mutant_id)
+        return self.schema_module
+
+    def create_test_suite(self, tests_modules, mutant_module, test_ids=None):
+        tests = []
         total_duration = 0
         injector = utils.ModuleInjector(mutant_module)
         for test_module, target_test, duration in tests_modules:
             injector.inject_to(test_module)
-            suite.addTests(self.get_test_suite(test_module, target_test))
+            if test_ids is None:
+                tests += self.get_tests(test_module, target_test)
             total_duration += duration
+        if test_ids is not None:
+            tests = [self.tests_by_id[test_id] for test_id in test_ids if test_id in self.tests_by_id]
         self.install_inject_importer(mutant_module)
-        return suite, total_duration
+        return unittest.TestSuite(utils.copy_test(test) for test in tests), total_duration
 
     def install_inject_importer(self, mutant_module):
         importer = utils.InjectImporter(mutant_module)
         importer.install()
 
-    def mark_not_covered_tests_as_skip(self, mutations, coverage_result, suite):
-        mutated_nodes = {mutation.node.marker for mutation in mutations}
-
-        def iter_tests(tests):
-            try:
-                for test in tests:
-                    iter_tests(test)
-            except TypeError:
-                add_skip(tests)
-
-        def add_skip(test):
-            if mutated_nodes.isdisjoint(coverage_result.test_covered_nodes[test]):
-                test_method = getattr(test, test._testMethodName)
-                setattr(test, test._testMethodName, unittest.skip('not covered')(test_method))
+    def get_mutant_test_ids(self, module_name, mutations, coverage_result, known_kills_number=None):
+        if coverage_result:
+            test_ids = coverage_result.get_covering_tests({mutation.node.marker for mutation in mutations})
+        elif self.prioritize_tests:
+            test_ids = list(self.test_live_times)
+        else:
+            return None
+        if self.prioritize_tests:
+            self.kill_history.apply_kills(known_kills_number)
+            test_ids = self.kill_history.sort_tests(test_ids, module_name, mutations, self.test_costs)
+        return test_ids
 
-        iter_tests(suite)
+    def update_kill_history(self, module_name, mutations, result, mutation_number=None):
+        if result and result.killer_id:
+            self.kill_history.add_kill(module_name, mutations, result.killer_id, mutation_number)
 
     @utils.TimeRegister
-    def run_tests_with_mutant(self, tests_modules, mutant_module, mutations, coverage_result):
-        suite, total_duration = self.create_test_suite(tests_modules, mutant_module)
-        if coverage_result:
-            self.mark_not_covered_tests_as_skip(mutations, coverage_result, suite)
+    def run_tests_with_mutant(self, tests_modules, mutant_module, mutations, test_ids, cache_key=None,
+                              equivalence_key=None):
+        suite, total_duration = self.create_test_suite(tests_modules, mutant_module, test_ids)
         timer = utils.Timer()
         result = self.run_mutation_test_runner(suite, total_duration)
         timer.stop()
-        self.update_score_and_notify_views(result, timer.duration)
+        self.update_mutant_result(mutant_module.__name__, mutations, cache_key, result, timer.duration,
+                                  equivalence_key)
+
+    def run_mutants_in_pool(self, worker_pool, mutants, target_module, tests_modules, coverage_result):
+        live_time = self.get_live_time(sum(duration for _, _, duration in tests_modules))
+        pending_mutants = collections.deque()
+
+        def generate_tasks():
+            mutation_number = self.score.all_mutants
+            for mutations, mutant_ast in mutants:
+                mutation_number += 1
+                if not self.is_mutant_selected(mutation_number, target_module.__name__, mutations):
+                    self.score.inc_incompetent()
+                    continue
+                equivalence_key = self.get_equivalence_key(mutant_ast, mutations)
+                test_ids = None
+                cache_key = None
+                cached_result = None
+                if equivalence_key is not EQUIVALENT:
+                    test_ids = self.get_mutant_test_ids(target_module.__name__, mutations, coverage_result,
+                                                        mutation_number - worker_pool.size)
+                    cache_key = self.get_cache_key(target_module, mutant_ast, mutations, test_ids, tests_modules)
+                    cached_result = self.get_cached_result(cache_key)
+                task = None
+                exception = None
+                duplicate = equivalence_key is EQUIVALENT or equivalence_key in scheduled_keys
+                if not cached_result and not duplicate:
+                    try:
+                        task = self.create_mutation_task(target_module, mutant_ast, test_ids, mutations)
+                    except BaseException as error:
+                        exception = error
+                if equivalence_key is not None and not exception:
+                    scheduled_keys.add(equivalence_key)
+                if worker_pool.size > 1:
+                    mutant = codegen.to_source(mutant_ast) if self.is_mutant_source_needed() else None
+                else:
+                    mutant = mutant_ast
+                pending_mutants.append((mutation_number, mutations, mutant, exception, cache_key, cached_result,
+                                        equivalence_key))
+                yield task, live_time
+
+        scheduled_keys = set()
+        for result, duration in worker_pool.imap(generate_tasks()):
+            mutation_number, mutations, mutant, exception, cache_key, cached_result, equivalence_key = \
+                pending_mutants.popleft()
+            self.notify_mutation(mutation_number, mutations, target_module.__name__, mutant)
+            if exception:
+                self.notify_incompetent(exception, tests_run=0)
+                self.score.inc_incompetent()
+            elif equivalence_key is EQUIVALENT:
+                self.update_equivalent_mutant()
+            else:
+                cached_result = cached_result or self.equivalent_results.get(equivalence_key)
+                if cached_result:
+                    result, duration = cached_result
+                self.update_mutant_result(target_module.__name__, mutations, cache_key, result, duration,
+                                          equivalence_key, mutation_number)
+
+    @utils.TimeRegister
+    def create_mutation_task(self, target_module, mutant_ast, test_ids, mutations=()):
+        if self.mutant_schema and self.mutant_schema.mutant_id:
+            with self.stdout_manager:
+                self.get_schema_module(target_module.__name__, self.mutant_schema.code)
+            return utils.MutationTestTask(
+                target_module.__name__,
+                self.mutant_schema.code,
+                test_ids,
+                self.mutant_schema.mutant_id,
+                None,
+            )
+        function_patch = self.create_function_patch(target_module, mutations)
+        if function_patch:
+            return utils.MutationTestTask(target_module.__name__, None, test_ids, None, function_patch.dumps())
+        return utils.create_mutation_test_task(
+            ast_node=mutant_ast,
+            module_name=target_module.__name__,
+            test_ids=test_ids,
+        )
+
+    def run_mutation_task(self, task, tests_modules):
+        try:
+            with self.stdout_manager:
+                if task.mutant_id:
+                    mutant_module = self.get_schema_module(task.module_name, task.code, task.mutant_id)
+                elif task.patch:
+                    self.function_patch = utils.FunctionPatch.loads(task.patch)
+                    mutant_module = self.function_patch.apply(self.target_modules[task.module_name])
+                else:
+                    mutant_module = utils.create_module_from_code(marshal.loads(task.code), task.module_name)
+        except BaseException as exception:
+            return utils.SerializableMutationTestResult(
+                is_incompetent=True,
+                is_survived=False,
+                killer=None,
+                exception_traceback=None,
+                exception=exception,
+                tests_run=0,
+                killer_id=None,
+            )
+        suite, _ = self.create_test_suite(tests_modules, mutant_module, task.test_ids)
+        result = utils.MutationTestResult(test_live_times=self.test_live_times)
+        try:
+            with self.stdout_manager:
+                result.run_suite(suite)
+        finally:
+            self.restore_function_patch()
+        return result.serialize()
+
+    def get_live_time(self, total_duration):
+        return self.timeout_factor * (total_duration if total_duration > 1 else 1)
+
+    def get_test_live_time(self, test_duration):
+        return self.timeout_factor * max(test_duration, self.MIN_TEST_DURATION)
+
+    def get_test_cost(self, test_duration):
+        return 2 ** max(0, round(math.log2(max(test_duration, self.TEST_COST_UNIT) / self.TEST_COST_UNIT)))
 
     def run_mutation_test_runner(self, suite, total_duration):
-        live_time = self.timeout_factor * (total_duration if total_duration > 1 else 1)
+        live_time = self.get_live_time(total_duration)
         test_runner_class = utils.get_mutation_test_runner_class()
-        test_runner = test_runner_class(suite=suite)
+        test_runner = test_runner_class(suite=suite, test_live_times=self.test_live_times)
         with self.stdout_manager:
             test_runner.start()
             result = test_runner.get_result(live_time)
             test_runner.terminate()
         return result
 
+    def get_cache_key(self, target_module, mutant_ast, mutations, test_ids, tests_modules):
+        if not self.results_cache:
+            return None
+        if test_ids is None:
+            test_ids = [test.id() for test_module, target_test, _ in tests_modules
+                        for test in self.get_tests(test_module, target_test)]
+        tests = []
+        for test_id in sorted(set(test_ids)):
+            source_hash = self.get_test_source_hash(self.tests_by_id[test_id])
+            if source_hash is None:
+                return None
+            tests.append((test_id, source_hash))
+        return cache.get_mutant_key(target_module.__name__, mutant_ast, mutations, tests)
+
+    def get_test_source_hash(self, test):
+        module_name = test.__class__.__module__
+        if module_name not in self.tests_sources_hashes:
+            try:
+                source_hash = cache.get_source_hash(self.get_module_source(sys.modules[module_name]))
+            except (KeyError, AttributeError, TypeError, OSError):
+                source_hash = None
+            self.tests_sources_hashes[module_name] = source_hash
+        return self.tests_sources_hashes[module_name]
+
+    def get_cached_result(self, cache_key):
+        if cache_key:
+            return self.results_cache.get(cache_key)
+
+    def update_mutant_result(self, module_name, mutations, cache_key, result, duration, equivalence_key=None,
+                             mutation_number=None):
+        self.update_kill_history(module_name, mutations, result, mutation_number)
+        if cache_key:
+            self.results_cache.set(cache_key, result, duration)
+        if equivalence_key is not None:
+            self.equivalent_results.setdefault(equivalence_key, (result, duration))
+        self.update_score_and_notify_views(result, duration)
+
     def update_score_and_notify_views(self, result, mutant_duration):
         if not result:
             self.update_timeout_mutant()
@@ -245,7 +695,38 @@ class MutationController(views.ViewNotifier):
 
     def update_killed_mutant(self, result, duration):
         self.notify_killed(duration, result.killer, result.exception_traceback, result.tests_run)
-        self.score.inc_killed()
+        self.score.inc_killed(result.tests_run)
+
+    def update_equivalent_mutant(self):
+        self.notify_equivalent()
+        self.score.inc_equivalent()
+
+
+def mutations_conflict(mutation, other, allow_same_operators=True):
+    return mutation.node is other.node or utils.is_related(mutation.node, other.node) or \
+        (not allow_same_operators and mutation.operator == other.operator)
+
+
+class MutationsQueue:
+
+    def __init__(self, size):
+        self.head = size
+        self.next = list(range(1, size + 1)) + [0]
+        self.prev = [size] + list(range(size))
+
+    def __bool__(self):
+        return self.next[self.head] != self.head
+
+    def iter(self, reverse=False):
+        links = self.prev if reverse else self.next
+        index = links[self.head]
+        while index != self.head:
+            yield index
+            index = links[index]
+
+    def remove(self, index):
+        self.next[self.prev[index]] = self.next[index]
+        self.prev[self.next[index]] = self.prev[index]
 
 
 class HOMStrategy:
@@ -253,98 +734,103 @@ class HOMStrategy:
     def __init__(self, order=2):
         self.order = order
 
-    def remove_bad_mutations(self, mutations_to_apply, available_mutations, allow_same_operators=True):
-        for mutation_to_apply in mutations_to_apply:
-            for available_mutation in available_mutations[:]:
-                if mutation_to_apply.node == available_mutation.node or \
-                   mutation_to_apply.node in available_mutation.node.children or \
-                   available_mutation.node in mutation_to_apply.node.children or \
-                   (not allow_same_operators and mutation_to_apply.operator == available_mutation.operator):
-                    available_mutations.remove(available_mutation)
+    def is_compatible(self, mutation, mutations_to_apply, allow_same_operators=True):
+        return not any(mutations_conflict(mutation_to_apply, mutation, allow_same_operators)
+                       for mutation_to_apply in mutations_to_apply)
+
+    def generate_in_order(self, mutations, from_last=lambda applied: False):
+        queue = MutationsQueue(len(mutations))
+        while queue:
+            mutations_to_apply = []
+            while len(mutations_to_apply) < self.order:
+                for index in queue.iter(reverse=from_last(len(mutations_to_apply))):
+                    if self.is_compatible(mutations[index], mutations_to_apply):
+                        break
+                else:
+                    break
+                queue.remove(index)
+                mutations_to_apply.append(mutations[index])
+            yield mutations_to_apply
 
 
 class FirstToLastHOMStrategy(HOMStrategy):
     name = 'FIRST_TO_LAST'
 
-    def generate(self, mutations):
-        mutations = mutations[:]
-        while mutations:
-            mutations_to_apply = []
-            index = 0
-            available_mutations = mutations[:]
-            while len(mutations_to_apply) < self.order and available_mutations:
-                try:
-                    mutation = available_mutations.pop(index)
-                    mutations_to_apply.append(mutation)
-                    mutations.remove(mutation)
-                    index = 0 if index == -1 else -1
-                except IndexError:
-                    break
-                self.remove_bad_mutations(mutations_to_apply, available_mutations)
-            yield mutations_to_apply
+    def generate(self, mutations, module_name=None):
+        return self.generate_in_order(mutations, from_last=lambda applied: applied % 2 == 1)
 
 
 class EachChoiceHOMStrategy(HOMStrategy):
     name = 'EACH_CHOICE'
 
-    def generate(self, mutations):
-        mutations = mutations[:]
-        while mutations:
-            mutations_to_apply = []
-            available_mutations = mutations[:]
-            while len(mutations_to_apply) < self.order and available_mutations:
-                try:
-                    mutation = available_mutations.pop(0)
-                    mutations_to_apply.append(mutation)
-                    mutations.remove(mutation)
-                except IndexError:
-                    break
-                self.remove_bad_mutations(mutations_to_apply, available_mutations)
-            yield mutations_to_apply
+    def generate(self, mutations, module_name=None):
+        return self.generate_in_order(mutations)
 
 
 class BetweenOperatorsHOMStrategy(HOMStrategy):
     name = 'BETWEEN_OPERATORS'
 
-    def generate(self, mutations):
-        usage = {mutation: 0 for mutation in mutations}
-        not_used = mutations[:]
+    def generate(self, mutations, module_name=None):
+        usage = [0] * len(mutations)
+        buckets = collections.defaultdict(dict)
+        for index, mutation in enumerate(mutations):
+            buckets[mutation.operator].setdefault(0, []).append(index)
+        not_used = len(mutations)
         while not_used:
             mutations_to_apply = []
-            available_mutations = mutations[:]
-            available_mutations.sort(key=lambda x: usage[x])
-            while len(mutations_to_apply) < self.order and available_mutations:
-                mutation = available_mutations.pop(0)
-                mutations_to_apply.append(mutation)
-                if not usage[mutation]:
-                    not_used.remove(mutation)
-                usage[mutation] += 1
-                self.remove_bad_mutations(mutations_to_apply, available_mutations, allow_same_operators=False)
+            while len(mutations_to_apply) < self.order:
+                index = self.find_least_used(mutations, usage, buckets, mutations_to_apply)
+                if index is None:
+                    break
+                mutations_to_apply.append(mutations[index])
+                if not usage[index]:
+                    not_used -= 1
+                self.move_to_next_level(buckets[mutations[index].operator], index, usage[index])
+                usage[index] += 1
             yield mutations_to_apply
 
+    def find_least_used(self, mutations, usage, buckets, mutations_to_apply):
+        used_operators = {mutation.operator for mutation in mutations_to_apply}
+        best = None
+        for operator, levels in buckets.items():
+            if operator in used_operators:
+                continue
+            for level in sorted(levels):
+                if best is not None and level > usage[best]:
+                    break
+                index = next((index for index in levels[level]
+                              if self.is_compatible(mutations[index], mutations_to_apply)), None)
+                if index is not None:
+                    if best is None or (level, index) < (usage[best], best):
+                        best = index
+                    break
+        return best
+
+    def move_to_next_level(self, levels, index, level):
+        indexes = levels[level]
+        del indexes[bisect.bisect_left(indexes, index)]
+        if not indexes:
+            del levels[level]
+        bisect.insort(levels.setdefault(level + 1, []), index)
+
 
 class RandomHOMStrategy(HOMStrategy):
     name = 'RANDOM'
 
-    def __init__(self, *args, shuffler=random.shuffle, **kwargs):
+    def __init__(self, *args, shuffler=random.shuffle, seed=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.shuffler = shuffler
+        self.seed = seed
 
-    def generate(self, mutations):
+    def generate(self, mutations, module_name=None):
         mutations = mutations[:]
-        self.shuffler(mutations)
-        while mutations:
-            mutations_to_apply = []
-            available_mutations = mutations[:]
-            while len(mutations_to_apply) < self.order and available_mutations:
-                try:
-                    mutation = available_mutations.pop(0)
-                    mutations_to_apply.append(mutation)
-                    mutations.remove(mutation)
-                except IndexError:
-                    break
-                self.remove_bad_mutations(mutations_to_apply, available_mutations)
-            yield mutations_to_apply
+        self.get_shuffler(module_name)(mutations)
+        return self.generate_in_order(mutations)
+
+    def get_shuffler(self, module_name):
+        if self.seed is None:
+            return self.shuffler
+        return random.Random('{}:{}'.format(self.seed, module_name)).shuffle
 
 
 hom_strategies = [
@@ -357,14 +843,54 @@ hom_strategies = [
 
 class FirstOrderMutator:
 
-    def __init__(self, operators, percentage=100):
+    def __init__(self, operators, percentage=100, max_mutants=None, seed=0):
         self.operators = operators
-        self.sampler = utils.RandomSampler(percentage)
+        self.sampler = sampling.MutantSampler(percentage, max_mutants, seed)
+        self.pruned_mutants = 0
+        self.population_mutants = 0
 
     def mutate(self, target_ast, to_mutate=None, coverage_injector=None, module=None):
-        for op in utils.sort_operators(self.operators):
-            for mutation, mutant in op().mutate(target_ast, to_mutate, self.sampler, coverage_injector, module=module):
-                yield [mutation], mutant
+        return self.apply_mutants(target_ast, to_mutate, coverage_injector, module)
+
+    def apply_mutants(self, target_ast, to_mutate, coverage_injector, module):
+        mutants = self.generate_mutants(target_ast, to_mutate, coverage_injector, module)
+        if self.sampler.is_active:
+            mutants = list(mutants)
+            self.population_mutants += len(mutants)
+            mutants = self.select_mutants(mutants, module)
+        for mutations in mutants:
+            if not self.sampler.is_active:
+                self.population_mutants += 1
+            yield from operators.apply_mutations(target_ast, mutations, module=module)
+
+    def select_mutants(self, mutants, module):
+        if self.sampler.is_active:
+            return self.sampler.select(get_module_name(module), mutants)
+        return mutants
+
+    def add_population(self, target_ast, to_mutate=None, module=None, coverage_injector=None):
+        mutants = self.list_mutants(target_ast, to_mutate, coverage_injector, module)
+        self.sampler.add_population(get_module_name(module), mutants)
+
+    def list_mutants(self, target_ast, to_mutate=None, coverage_injector=None, module=None):
+        pruned_mutants = self.pruned_mutants
+        mutants = list(self.generate_mutants(target_ast, to_mutate, coverage_injector, module))
+        self.pruned_mutants = pruned_mutants
+        return mutants
+
+    def generate_mutants(self, target_ast, to_mutate, coverage_injector, module):
+        mutations = self.generate_all_mutations(coverage_injector, module, target_ast, to_mutate)
+        return [[mutation] for mutation in mutations]
+
+    def generate_all_mutations(self, coverage_injector, module, target_ast, to_mutate):
+        node_types = utils.NodeTypesIndex(target_ast)
+        operators_list = [op() for op in utils.sort_operators(self.operators)]
+        for operator in operators_list:
+            operator.set_context(to_mutate, coverage_injector, module, node_types)
+        mutations = operators.find_mutations(target_ast, operators_list)
+        for operator in operators_list:
+            self.pruned_mutants += getattr(operator, 'pruned_mutants', 0)
+        return mutations
 
 
 class HighOrderMutator(FirstOrderMutator):
@@ -373,41 +899,10 @@ class HighOrderMutator(FirstOrderMutator):
         super().__init__(*args, **kwargs)
         self.hom_strategy = hom_strategy or FirstToLastHOMStrategy(order=2)
 
-    def mutate(self, target_ast, to_mutate=None, coverage_injector=None, module=None):
+    def generate_mutants(self, target_ast, to_mutate, coverage_injector, module):
         mutations = self.generate_all_mutations(coverage_injector, module, target_ast, to_mutate)
-        for mutations_to_apply in self.hom_strategy.generate(mutations):
-            generators = []
-            applied_mutations = []
-            mutant = target_ast
-            for mutation in mutations_to_apply:
-                generator = mutation.operator().mutate(
-                    mutant,
-                    to_mutate=to_mutate,
-                    sampler=self.sampler,
-                    coverage_injector=coverage_injector,
-                    module=module,
-                    only_mutation=mutation,
-                )
-                try:
-                    new_mutation, mutant = generator.__next__()
-                except StopIteration:
-                    assert False, 'no mutations!'
-                applied_mutations.append(new_mutation)
-                generators.append(generator)
-            yield applied_mutations, mutant
-            self.finish_generators(generators)
+        return self.hom_strategy.generate(mutations, get_module_name(module))
 
-    def generate_all_mutations(self, coverage_injector, module, target_ast, to_mutate):
-        mutations = []
-        for op in utils.sort_operators(self.operators):
-            for mutation, _ in op().mutate(target_ast, to_mutate, None, coverage_injector, module=module):
-                mutations.append(mutation)
-        return mutations
 
-    def finish_generators(self, generators):
-        for generator in reversed(generators):
-            try:
-                generator.__next__()
-            except StopIteration:
-                continue
-            assert False, 'too many mutations!'
+def get_module_name(module):
+    return module.__name__ if module else None
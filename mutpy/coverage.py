@@ -1,9 +1,13 @@
 import ast
+import collections
 import copy
+import sys
+import types
 import unittest
 from mutpy import utils
 
 COVERAGE_SET_NAME = '__covered_nodes__'
+SCOPE_NODES = utils.FUNCTION_NODES + (ast.ClassDef,)
 
 
 class MarkerNodeTransformer(ast.NodeTransformer):
@@ -16,7 +20,9 @@ class MarkerNodeTransformer(ast.NodeTransformer):
         if not hasattr(node, 'marker'):
             node.marker = self.last_marker
             self.last_marker += 1
-        return super().visit(node)
+        result_node = super().visit(node)
+        node.markers_end = self.last_marker
+        return result_node
 
 
 class AbstractCoverageNodeTransformer(ast.NodeTransformer):
@@ -60,17 +66,20 @@ class AbstractCoverageNodeTransformer(ast.NodeTransformer):
         if node.__class__ in self.get_definitions_nodes():
             coverage_node = utils.create_ast('{}.add({})'.format(COVERAGE_SET_NAME, node.marker)).body[0]
         else:
-            markers = {node.marker} | {node.marker for node in node.children}
+            markers = self.get_markers(node)
             if node.__class__ in self.get_branch_nodes():
                 for body_el in node.body:
                     if hasattr(body_el, 'marker'):
-                        markers.difference_update({body_el.marker})
-                        markers.difference_update({node.marker for node in body_el.children})
+                        markers.difference_update(self.get_markers(body_el))
             coverage_node = utils.create_ast('{}.update({})'.format(COVERAGE_SET_NAME, repr(markers))).body[0]
         coverage_node.lineno = node.lineno
         coverage_node.col_offset = node.col_offset
         return coverage_node
 
+    @staticmethod
+    def get_markers(node):
+        return set(range(node.marker, node.markers_end))
+
     def is_future_statement(self, node):
         return isinstance(node, ast.ImportFrom) and node.module == '__future__'
 
@@ -188,6 +197,152 @@ class CoverageInjector:
     def get_result(self):
         return len(self.covered_nodes), self.marker_transformer.last_marker
 
+    def start_test(self):
+        pass
+
+    def stop_test(self):
+        pass
+
+
+class AbstractCoverageTracer(CoverageInjector):
+
+    def __init__(self, module=None):
+        super().__init__()
+        self.module = module
+        self.lines_markers = collections.defaultdict(set)
+        self.codes = set()
+
+    def inject(self, node, module_name='coverage'):
+        self.covered_nodes.clear()
+        self.marker_transformer = MarkerNodeTransformer()
+        marker_node = self.marker_transformer.visit(node)
+        self.lines_markers.clear()
+        coverage_transformer = CoverageNodeTransformer()
+        coverable_nodes = coverage_transformer.get_coverable_nodes()
+        for child_node in ast.walk(marker_node):
+            if child_node.__class__ in coverable_nodes and not coverage_transformer.is_future_statement(child_node):
+                self.add_lines_markers(child_node)
+        self.covered_nodes.add(marker_node.marker)
+        code = self.get_code(marker_node, module_name)
+        self.codes = set(self.get_codes(code))
+        self.start_test()
+        try:
+            with utils.StdoutManager():
+                return utils.create_module_from_code(code, module_name)
+        finally:
+            self.stop_test()
+
+    def add_lines_markers(self, node):
+        markers = AbstractCoverageNodeTransformer.get_markers(node)
+        body_lines = []
+        for field in ['body', 'orelse', 'handlers', 'finalbody']:
+            for body_el in getattr(node, field, []):
+                markers.difference_update(AbstractCoverageNodeTransformer.get_markers(body_el))
+                body_lines.append(body_el.lineno)
+        first_line = min([node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', [])])
+        last_line = min(body_lines) - 1 if body_lines else getattr(node, 'end_lineno', node.lineno)
+        scope_name = self.get_scope_name(node)
+        for line in range(first_line, max(first_line, last_line) + 1):
+            self.lines_markers[scope_name, line].update(markers)
+
+    @staticmethod
+    def get_scope_name(node):
+        node = getattr(node, 'parent', None)
+        while node is not None:
+            if isinstance(node, SCOPE_NODES):
+                return node.name
+            node = getattr(node, 'parent', None)
+        return '<module>'
+
+    def get_code(self, node, module_name):
+        try:
+            code = self.module.__loader__.get_code(self.module.__name__)
+        except Exception:
+            code = None
+        return code or compile(node, module_name, 'exec')
+
+    def get_codes(self, code):
+        yield code
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                yield from self.get_codes(const)
+
+    def trace_line(self, code, line):
+        markers = self.lines_markers.get((code.co_name, line))
+        if markers:
+            self.covered_nodes.update(markers)
+
+
+class CoverageTracerPython32(AbstractCoverageTracer):
+
+    __python_version__ = (3, 2)
+
+    def __init__(self, module=None):
+        super().__init__(module)
+        self.previous_tracer = None
+
+    def start_test(self):
+        self.previous_tracer = sys.gettrace()
+        sys.settrace(self.trace_call)
+
+    def stop_test(self):
+        sys.settrace(self.previous_tracer)
+        self.previous_tracer = None
+
+    def trace_call(self, frame, event, arg):
+        if frame.f_code in self.codes:
+            return self.trace_local
+        return None
+
+    def trace_local(self, frame, event, arg):
+        if event == 'line':
+            self.trace_line(frame.f_code, frame.f_lineno)
+        return self.trace_local
+
+
+class CoverageTracerPython312(CoverageTracerPython32):
+
+    __python_version__ = (3, 12)
+    TOOL_NAME = 'mutpy'
+
+    def __init__(self, module=None):
+        super().__init__(module)
+        self.tool_id = None
+
+    def start_test(self):
+        monitoring = sys.monitoring
+        for tool_id in [monitoring.COVERAGE_ID, 3, 4]:
+            if monitoring.get_tool(tool_id) is None:
+                self.tool_id = tool_id
+                break
+        else:
+            return super().start_test()
+        monitoring.use_tool_id(self.tool_id, self.TOOL_NAME)
+        monitoring.register_callback(self.tool_id, monitoring.events.LINE, self.monitor_line)
+        for code in self.codes:
+            monitoring.set_local_events(self.tool_id, code, monitoring.events.LINE)
+        monitoring.restart_events()
+
+    def stop_test(self):
+        if self.tool_id is None:
+            return super().stop_test()
+        monitoring = sys.monitoring
+        for code in self.codes:
+            monitoring.set_local_events(self.tool_id, code, monitoring.events.NO_EVENTS)
+        monitoring.register_callback(self.tool_id, monitoring.events.LINE, None)
+        monitoring.free_tool_id(self.tool_id)
+        self.tool_id = None
+
+    def monitor_line(self, code, line):
+        self.trace_line(code, line)
+        return sys.monitoring.DISABLE
+
+
+CoverageTracer = utils.get_by_python_version([
+    CoverageTracerPython32,
+    CoverageTracerPython312,
+])
+
 
 class CoverageTestResult(unittest.TestResult):
 
@@ -196,13 +351,29 @@ class CoverageTestResult(unittest.TestResult):
         self.coverage_injector = coverage_injector
         self.always_covered_nodes = coverage_injector.covered_nodes.copy()
         self.test_covered_nodes = {}
+        self.covering_tests = collections.defaultdict(list)
+        self.tests_positions = {}
 
     def startTest(self, test):
         super().startTest(test)
         self.covered_nodes = self.coverage_injector.covered_nodes.copy()
         self.coverage_injector.covered_nodes.clear()
+        self.coverage_injector.start_test()
 
     def stopTest(self, test):
+        self.coverage_injector.stop_test()
         super().stopTest(test)
-        self.test_covered_nodes[test] = self.coverage_injector.covered_nodes.copy() | self.always_covered_nodes
+        covered_nodes = self.coverage_injector.covered_nodes.copy() | self.always_covered_nodes
+        self.test_covered_nodes[test] = covered_nodes
+        self.tests_positions[test.id()] = len(self.tests_positions)
+        for marker in covered_nodes:
+            self.covering_tests[marker].append(test.id())
         self.coverage_injector.covered_nodes.update(self.covered_nodes)
+
+    def get_covering_tests(self, markers):
+        if len(markers) == 1:
+            return list(self.covering_tests.get(next(iter(markers)), []))
+        test_ids = set()
+        for marker in markers:
+            test_ids.update(self.covering_tests.get(marker, []))
+        return sorted(test_ids, key=self.tests_positions.get)
@@ -0,0 +1,184 @@
+import collections
+import ipaddress
+import itertools
+import secrets
+import sys
+import threading
+from multiprocessing.connection import Client, Listener
+
+DEFAULT_AUTHKEY = 'mutpy'
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(':')
+    return host or 'localhost', int(port)
+
+
+def is_loopback(address):
+    host = address[0]
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host.strip('[]')).is_loopback
+    except ValueError:
+        return False
+
+
+def get_authkey(address, authkey=None):
+    if authkey:
+        return authkey
+    if is_loopback(address):
+        return DEFAULT_AUTHKEY
+    raise ValueError('authkey is required for non-loopback address {}:{}'.format(*address))
+
+
+def generate_authkey():
+    return secrets.token_hex(16)
+
+
+class Coordinator:
+
+    def __init__(self, address, authkey=None, batch_size=4, lookahead=64, worker_timeout_margin=30):
+        self.listener = Listener(address, authkey=get_authkey(address, authkey).encode())
+        self.batch_size = batch_size
+        self.lookahead = lookahead
+        self.worker_timeout_margin = worker_timeout_margin
+        self.condition = threading.Condition()
+        self.queue = collections.deque()
+        self.results = {}
+        self.task_ids = itertools.count()
+        self.closed = False
+        self.accept_thread = threading.Thread(target=self.accept_workers)
+        self.accept_thread.daemon = True
+        self.accept_thread.start()
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    @property
+    def size(self):
+        return self.lookahead
+
+    def accept_workers(self):
+        while not self.closed:
+            try:
+                connection = self.listener.accept()
+            except (OSError, EOFError):
+                if self.closed:
+                    break
+                continue
+            worker_thread = threading.Thread(target=self.serve_worker, args=(connection,))
+            worker_thread.daemon = True
+            worker_thread.start()
+
+    def serve_worker(self, connection):
+        try:
+            if tuple(connection.recv()) != tuple(sys.version_info[:2]):
+                connection.send(None)
+                return
+            while True:
+                batch = self.take_batch()
+                if not batch:
+                    connection.send(None)
+                    return
+                self.run_batch(connection, batch)
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+
+    def run_batch(self, connection, batch):
+        pending = collections.OrderedDict((task_id, (task, live_time)) for task_id, task, live_time in batch)
+        try:
+            connection.send(batch)
+            while pending:
+                timeout = sum(live_time for _, live_time in pending.values()) + self.worker_timeout_margin
+                if not connection.poll(timeout):
+                    raise EOFError()
+                task_id, result, duration = connection.recv()
+                if pending.pop(task_id, None):
+                    self.put_result(task_id, result, duration)
+        except (EOFError, OSError):
+            self.requeue([(task_id, task, live_time) for task_id, (task, live_time) in pending.items()])
+            raise
+
+    def take_batch(self):
+        with self.condition:
+            while not self.queue and not self.closed:
+                self.condition.wait()
+            batch = []
+            while self.queue and len(batch) < self.batch_size:
+                batch.append(self.queue.popleft())
+            return batch
+
+    def requeue(self, tasks):
+        with self.condition:
+            self.queue.extendleft(reversed(tasks))
+            self.condition.notify_all()
+
+    def put_result(self, task_id, result, duration):
+        with self.condition:
+            self.results[task_id] = (result, duration)
+            self.condition.notify_all()
+
+    def imap(self, tasks):
+        tasks = iter(tasks)
+        task_ids = collections.deque()
+        exhausted = False
+        while True:
+            while not exhausted and len(task_ids) < self.lookahead:
+                try:
+                    task, live_time = next(tasks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                task_id = next(self.task_ids)
+                task_ids.append(task_id)
+                if task is None:
+                    self.put_result(task_id, None, 0)
+                else:
+                    with self.condition:
+                        self.queue.append((task_id, task, live_time))
+                        self.condition.notify_all()
+            if not task_ids:
+                return
+            with self.condition:
+                while task_ids[0] not in self.results:
+                    self.condition.wait()
+                result = self.results.pop(task_ids.popleft())
+            yield result
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.listener.close()
+
+
+class Worker:
+
+    def __init__(self, address, worker_pool, authkey=None):
+        self.address = address
+        self.worker_pool = worker_pool
+        self.authkey = get_authkey(address, authkey)
+
+    def run(self):
+        connection = Client(self.address, authkey=self.authkey.encode())
+        try:
+            connection.send(tuple(sys.version_info[:2]))
+            while True:
+                batch = connection.recv()
+                if batch is None:
+                    break
+                self.run_batch(connection, batch)
+        except EOFError:
+            pass
+        finally:
+            connection.close()
+            self.worker_pool.close()
+
+    def run_batch(self, connection, batch):
+        results = self.worker_pool.imap((task, live_time) for _, task, live_time in batch)
+        for (task_id, _, _), (result, duration) in zip(batch, results):
+            connection.send((task_id, result, duration))
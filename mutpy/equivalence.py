@@ -0,0 +1,47 @@
+import ast
+import hashlib
+import types
+from mutpy import utils
+
+CODE_ATTRIBUTES = ['co_argcount', 'co_posonlyargcount', 'co_kwonlyargcount', 'co_flags', 'co_code', 'co_names',
+                   'co_varnames', 'co_freevars', 'co_cellvars', 'co_exceptiontable']
+
+
+def get_code_fingerprint(code):
+    fingerprint = [getattr(code, attr, None) for attr in CODE_ATTRIBUTES]
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            fingerprint.append(get_code_fingerprint(const))
+        else:
+            fingerprint.append((type(const).__name__, repr(const)))
+    return hashlib.sha1(repr(fingerprint).encode()).digest()
+
+
+class TrivialCompilerEquivalence:
+
+    def __init__(self, target_ast, module_name):
+        self.module_name = module_name
+        self.module_fingerprint = get_code_fingerprint(compile(target_ast, module_name, 'exec'))
+        self.functions_fingerprints = {}
+        for node in ast.walk(target_ast):
+            if isinstance(node, utils.FUNCTION_NODES):
+                _, code = utils.compile_function(node, module_name)
+                if code:
+                    self.functions_fingerprints[node] = get_code_fingerprint(code)
+
+    def get_keys(self, mutant_ast, mutations):
+        scopes = {utils.get_function_scope(mutation.node) for mutation in mutations}
+        try:
+            if all(scope in self.functions_fingerprints for scope in scopes):
+                scopes = sorted(scopes, key=lambda scope: (scope.lineno, scope.col_offset))
+                scopes_ids = tuple((scope.lineno, scope.col_offset) for scope in scopes)
+                original = tuple(self.functions_fingerprints[scope] for scope in scopes)
+                mutant = tuple(get_code_fingerprint(utils.compile_function(scope, self.module_name)[1])
+                               for scope in scopes)
+            else:
+                scopes_ids = ()
+                original = self.module_fingerprint
+                mutant = get_code_fingerprint(compile(mutant_ast, self.module_name, 'exec'))
+        except Exception:
+            return None, None
+        return (scopes_ids, original), (scopes_ids, mutant)
@@ -1,7 +1,9 @@
 import ast
+import collections
 import re
 import copy
 import functools
+import hashlib
 from mutpy import utils
 
 
@@ -17,41 +19,217 @@ class Mutation:
         self.visitor = visitor
 
 
+class MutationDescriptor:
+    __slots__ = ['module_name', 'node_path', 'node_type', 'lineno', 'col_offset', 'operator_name', 'visitor']
+
+    def __init__(self, module_name, node_path, node_type, lineno, col_offset, operator_name, visitor):
+        self.module_name = module_name
+        self.node_path = node_path
+        self.node_type = node_type
+        self.lineno = lineno
+        self.col_offset = col_offset
+        self.operator_name = operator_name
+        self.visitor = visitor
+
+    @classmethod
+    def create(cls, module_name, mutation):
+        node = mutation.node
+        lineno, col_offset = get_node_position(node)
+        return cls(
+            module_name=module_name,
+            node_path=get_node_path(node),
+            node_type=node.__class__.__name__,
+            lineno=lineno,
+            col_offset=col_offset,
+            operator_name=mutation.operator.name(),
+            visitor=mutation.visitor,
+        )
+
+    @property
+    def id(self):
+        return get_mutant_id([self])
+
+    def key(self):
+        return self.module_name, self.node_path, self.node_type, self.operator_name, self.visitor
+
+    def to_mutation(self, target_ast):
+        node = target_ast
+        for field, index in self.node_path:
+            node = getattr(node, field)
+            if index is not None:
+                node = node[index]
+        if node.__class__.__name__ != self.node_type:
+            raise ValueError('Node {} is not {}.'.format(node.__class__.__name__, self.node_type))
+        return Mutation(operator=get_operator(self.operator_name, self.visitor), node=node, visitor=self.visitor)
+
+    def __eq__(self, other):
+        return isinstance(other, MutationDescriptor) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return '<MutationDescriptor {} {}:{}>'.format(self.operator_name, self.module_name, self.lineno)
+
+
+def get_node_position(node):
+    while node is not None and 'lineno' not in node._attributes:
+        node = getattr(node, 'parent', None)
+    if node is None:
+        return None, None
+    return node.lineno, node.col_offset
+
+
+def get_node_path(node):
+    path = []
+    while getattr(node, 'parent', None) is not None:
+        path.append(node.parent_field)
+        node = node.parent
+    return tuple(reversed(path))
+
+
+def get_mutant_id(descriptors):
+    return hashlib.sha1(repr([descriptor.key() for descriptor in descriptors]).encode()).hexdigest()[:16]
+
+
+def get_mutations_id(module_name, mutations):
+    return get_mutant_id([MutationDescriptor.create(module_name, mutation) for mutation in mutations])
+
+
+def rebuild_mutant(target_ast, descriptors, module=None):
+    mutations = [descriptor.to_mutation(target_ast) for descriptor in descriptors]
+    yield from apply_mutations(target_ast, mutations, module=module)
+
+
+def get_operator(name, visitor=None):
+    for operator in utils.sort_operators(standard_operators | experimental_operators) + \
+            list(sufficient_operators.values()):
+        if operator.name() == name and (visitor is None or hasattr(operator, visitor)):
+            return operator
+    raise KeyError(name)
+
+
+def apply_mutations(target_ast, mutations, module=None):
+    applied_mutations = []
+    replaced_values = []
+    try:
+        for mutation in mutations:
+            operator = mutation.operator()
+            operator.module = module
+            applied_mutation, new_node = operator.apply(mutation.node, mutation.visitor)
+            applied_mutations.append(applied_mutation)
+            replaced_values.append(replace_node(mutation.node, new_node))
+        yield applied_mutations, target_ast
+    finally:
+        for parent, field, value in reversed(replaced_values):
+            restore_field(parent, field, value)
+
+
+def find_mutations(target_ast, operators):
+    operators_mutations = visit_operators(target_ast, list(enumerate(operators)))
+    return [mutation for index in range(len(operators)) for mutation in operators_mutations.get(index, [])]
+
+
+def visit_operators(node, operators):
+    operators = [(index, operator) for index, operator in operators if operator.should_visit(node)]
+    if not operators:
+        return {}
+    operators[0][1].fix_lineno(node)
+    visitors = {index: operator.find_visitors(node) for index, operator in operators}
+    pruned_mutants = {index: getattr(operator, 'pruned_mutants', 0) for index, operator in operators}
+    children_mutations = collections.defaultdict(list)
+    for child in ast.iter_child_nodes(node):
+        for index, mutations in visit_operators(child, operators).items():
+            children_mutations[index] += mutations
+    operators_mutations = {}
+    for index, operator in operators:
+        if not visitors[index]:
+            operators_mutations[index] = children_mutations[index]
+            continue
+        if hasattr(operator, 'pruned_mutants'):
+            children_pruned_mutants = operator.pruned_mutants - pruned_mutants[index]
+            operator.pruned_mutants += (len(visitors[index]) - 1) * children_pruned_mutants
+        mutations = operators_mutations[index] = []
+        for visitor in visitors[index]:
+            try:
+                visitor(node)
+            except MutationResign:
+                pass
+            else:
+                mutations.append(operator.create_mutation(node, visitor.__name__))
+            mutations += children_mutations[index]
+    return operators_mutations
+
+
+def replace_node(node, new_node):
+    parent = node.parent
+    field, index = node.parent_field
+    value = getattr(parent, field)
+    if index is None:
+        if new_node is None:
+            delattr(parent, field)
+        else:
+            setattr(parent, field, new_node)
+        return parent, field, value
+    if index >= len(value) or value[index] is not node:
+        index = next(position for position, item in enumerate(value) if item is node)
+    old_value = value[:]
+    if isinstance(new_node, ast.AST):
+        value[index] = new_node
+    else:
+        value[index:index+1] = new_node
+    return parent, field, old_value
+
+
+def restore_field(parent, field, value):
+    if isinstance(value, list):
+        getattr(parent, field)[:] = value
+    else:
+        setattr(parent, field, value)
+
+
 def copy_node(mutate):
+    @functools.wraps(mutate)
     def f(self, node):
-        copied_node = copy.deepcopy(node, memo={
-            id(node.parent): node.parent,
-        })
+        copied_node = copy.copy(node)
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                setattr(copied_node, field, value[:])
         return mutate(self, copied_node)
     return f
 
 
 class MutationOperator:
 
-    def mutate(self, node, to_mutate=None, sampler=None, coverage_injector=None, module=None, only_mutation=None):
+    def mutate(self, node, to_mutate=None, coverage_injector=None, module=None, node_types=None):
+        self.set_context(to_mutate, coverage_injector, module, node_types)
+        for new_node in self.visit(node):
+            yield self.create_mutation(self.current_node, self.visitor), new_node
+
+    def set_context(self, to_mutate=None, coverage_injector=None, module=None, node_types=None):
         self.to_mutate = to_mutate
-        self.sampler = sampler
-        self.only_mutation = only_mutation
+        self.node_types = node_types
         self.coverage_injector = coverage_injector
         self.module = module
-        for new_node in self.visit(node):
-            yield Mutation(operator=self.__class__, node=self.current_node, visitor=self.visitor), new_node
 
-    def visit(self, node):
+    def create_mutation(self, node, visitor):
+        return Mutation(operator=self.__class__, node=node, visitor=visitor)
+
+    def should_visit(self, node):
         if self.has_notmutate(node) or (self.coverage_injector and not self.coverage_injector.is_covered(node)):
-            return
-        if self.only_mutation and self.only_mutation.node != node and self.only_mutation.node not in node.children:
+            return False
+        if isinstance(self.to_mutate, utils.ChangedLines) and not self.to_mutate.intersects(node):
+            return False
+        return not self.node_types or self.node_types.contains_any(node, self.get_visitors_table())
+
+    def visit(self, node):
+        if not self.should_visit(node):
             return
         self.fix_lineno(node)
         visitors = self.find_visitors(node)
         if visitors:
             for visitor in visitors:
                 try:
-                    if self.sampler and not self.sampler.is_mutation_time():
-                        raise MutationResign
-                    if self.only_mutation and \
-                            (self.only_mutation.node != node or self.only_mutation.visitor != visitor.__name__):
-                        raise MutationResign
                     new_node = visitor(node)
                     self.visitor = visitor.__name__
                     self.current_node = node
@@ -67,6 +245,16 @@ class MutationOperator:
             for new_node in self.generic_visit(node):
                 yield new_node
 
+    def apply(self, node, visitor):
+        self.fix_lineno(node)
+        try:
+            new_node = getattr(self, visitor)(node)
+        except MutationResign:
+            assert False, 'no mutations!'
+        self.fix_node_internals(node, new_node)
+        ast.fix_missing_locations(new_node)
+        return Mutation(operator=self.__class__, node=node, visitor=visitor), new_node
+
     def generic_visit(self, node):
         for field, old_value in ast.iter_fields(node):
             if isinstance(old_value, list):
@@ -113,23 +301,30 @@ class MutationOperator:
             return False
 
     def fix_lineno(self, node):
-        if not hasattr(node, 'lineno') and getattr(node, 'parent', None) is not None and hasattr(node.parent, 'lineno'):
-            node.lineno = node.parent.lineno
+        if 'lineno' not in node._attributes and getattr(node, 'parent', None) is not None:
+            lineno, _ = get_node_position(node.parent)
+            if lineno is not None:
+                node.lineno = lineno
 
     def fix_node_internals(self, old_node, new_node):
         if not hasattr(new_node, 'parent'):
-            new_node.children = old_node.children
+            new_node.interval = old_node.interval
             new_node.parent = old_node.parent
         if hasattr(old_node, 'marker'):
             new_node.marker = old_node.marker
 
     def find_visitors(self, node):
-        method_prefix = 'mutate_' + node.__class__.__name__
-        return self.getattrs_like(method_prefix)
+        return [getattr(self, attr) for attr in self.get_visitors_table().get(node.__class__.__name__, ())]
 
-    def getattrs_like(ob, attr_like):
-        pattern = re.compile(attr_like + "($|(_\w+)+$)")
-        return [getattr(ob, attr) for attr in dir(ob) if pattern.match(attr)]
+    @classmethod
+    def get_visitors_table(cls):
+        if 'visitors_table' not in cls.__dict__:
+            cls.visitors_table = {}
+            for attr in dir(cls):
+                match = re.match(r'mutate_([^\W_]+)($|(_\w+)+$)', attr)
+                if match:
+                    cls.visitors_table.setdefault(match.group(1), []).append(attr)
+        return cls.visitors_table
 
     @classmethod
     def name(cls):
@@ -364,6 +559,7 @@ class AbstractOverriddenElementModification(MutationOperator):
 
 class HidingVariableDeletion(AbstractOverriddenElementModification):
 
+    @copy_node
     def mutate_Assign(self, node):
         if len(node.targets) > 1:
             raise MutationResign()
@@ -392,8 +588,10 @@ class HidingVariableDeletion(AbstractOverriddenElementModification):
             node.value = new_values[0]
             return node
         else:
-            target.elts = new_targets
-            value.elts = new_values
+            node.targets = [copy.copy(target)]
+            node.targets[0].elts = new_targets
+            node.value = copy.copy(value)
+            node.value.elts = new_values
             return node
 
     @classmethod
@@ -524,6 +722,95 @@ class RelationalOperatorReplacement(MutationOperator):
         return ast.Eq()
 
 
+class SufficientOperatorReplacement(MutationOperator):
+    default_operator = None
+    subsumed_visitors = {}
+
+    def __init__(self):
+        self.pruned_mutants = 0
+
+    def create_mutation(self, node, visitor):
+        if not any(visitor in visitors for visitors in self.default_operator.get_visitors_table().values()):
+            self.pruned_mutants -= 1
+        return super().create_mutation(node, visitor)
+
+    def find_visitors(self, node):
+        visitors = super().find_visitors(node)
+        if visitors:
+            self.pruned_mutants += self.subsumed_visitors.get(node.__class__.__name__, 0)
+        return visitors
+
+    @classmethod
+    def name(cls):
+        return cls.default_operator.name()
+
+    @classmethod
+    def long_name(cls):
+        return super().long_name()[len('sufficient '):]
+
+
+class SufficientLogicalConnectorReplacement(SufficientOperatorReplacement):
+    default_operator = LogicalConnectorReplacement
+    subsumed_visitors = {'BoolOp': 1}
+
+    @copy_node
+    def mutate_BoolOp_to_lhs(self, node):
+        return self.remove_operand(node, -1)
+
+    @copy_node
+    def mutate_BoolOp_to_rhs(self, node):
+        return self.remove_operand(node, 0)
+
+    def mutate_BoolOp_to_constant(self, node):
+        return ast.copy_location(utils.create_constant(isinstance(node.op, ast.Or)), node)
+
+    def remove_operand(self, node, index):
+        del node.values[index]
+        if len(node.values) == 1:
+            return node.values[0]
+        return node
+
+
+class SufficientRelationalOperatorReplacement(SufficientOperatorReplacement):
+    default_operator = RelationalOperatorReplacement
+    subsumed_visitors = {'Lt': 1, 'Gt': 1, 'LtE': 1, 'GtE': 1}
+
+    def mutate_Lt_to_LtE(self, node):
+        return ast.LtE()
+
+    def mutate_Lt_to_NotEq(self, node):
+        return ast.NotEq()
+
+    def mutate_Gt_to_GtE(self, node):
+        return ast.GtE()
+
+    def mutate_Gt_to_NotEq(self, node):
+        return ast.NotEq()
+
+    def mutate_LtE_to_Lt(self, node):
+        return ast.Lt()
+
+    def mutate_LtE_to_Eq(self, node):
+        return ast.Eq()
+
+    def mutate_GtE_to_Gt(self, node):
+        return ast.Gt()
+
+    def mutate_GtE_to_Eq(self, node):
+        return ast.Eq()
+
+    def mutate_Eq(self, node):
+        return ast.NotEq()
+
+    def mutate_NotEq(self, node):
+        return ast.Eq()
+
+    def mutate_Compare_to_constant(self, node):
+        if len(node.ops) != 1 or not isinstance(node.ops[0], (ast.Lt, ast.Gt, ast.LtE, ast.GtE)):
+            raise MutationResign()
+        return ast.copy_location(utils.create_constant(isinstance(node.ops[0], (ast.LtE, ast.GtE))), node)
+
+
 class SliceIndexRemove(MutationOperator):
 
     def mutate_Slice_remove_lower(self, node):
@@ -731,3 +1018,8 @@ experimental_operators = {
     StaticmethodDecoratorInsertion,
     ZeroIterationLoop,
 }
+
+sufficient_operators = {
+    LogicalConnectorReplacement: SufficientLogicalConnectorReplacement,
+    RelationalOperatorReplacement: SufficientRelationalOperatorReplacement,
+}
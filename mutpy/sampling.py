@@ -0,0 +1,70 @@
+import collections
+import hashlib
+from mutpy import operators, utils
+
+
+def get_stratum(module_name, mutation):
+    function_node = utils.get_function_scope(mutation.node)
+    function = (function_node.name, function_node.lineno) if function_node else None
+    return module_name, mutation.operator.name(), function
+
+
+def get_rank(seed, key):
+    return hashlib.sha1('{}:{}'.format(seed, key).encode()).digest()
+
+
+def allocate(strata_sizes, target, seed=0):
+    total = sum(strata_sizes.values())
+    if not total:
+        return {}
+    quotas = {stratum: size * target / total for stratum, size in strata_sizes.items()}
+    allocation = {stratum: int(quota) for stratum, quota in quotas.items()}
+    remaining = target - sum(allocation.values())
+    by_remainder = sorted(strata_sizes, key=lambda stratum: (
+        allocation[stratum] - quotas[stratum],
+        get_rank(seed, repr(stratum)),
+    ))
+    for stratum in by_remainder[:remaining]:
+        allocation[stratum] += 1
+    return allocation
+
+
+class MutantSampler:
+
+    def __init__(self, percentage=100, max_mutants=None, seed=0):
+        self.percentage = percentage if 0 < percentage < 100 else 100
+        self.max_mutants = max_mutants
+        self.seed = seed
+        self.strata_sizes = collections.Counter()
+        self.allocation = None
+
+    @property
+    def is_active(self):
+        return self.percentage < 100 or self.max_mutants is not None
+
+    def get_target(self, total):
+        target = total * self.percentage / 100
+        if self.max_mutants is not None:
+            target = min(target, self.max_mutants)
+        return max(1, round(target)) if total else 0
+
+    def add_population(self, module_name, mutants):
+        for mutations in mutants:
+            self.strata_sizes[get_stratum(module_name, mutations[0])] += 1
+
+    def allocate(self):
+        self.allocation = allocate(self.strata_sizes, self.get_target(sum(self.strata_sizes.values())), self.seed)
+
+    def select(self, module_name, mutants):
+        strata = collections.defaultdict(list)
+        for index, mutations in enumerate(mutants):
+            strata[get_stratum(module_name, mutations[0])].append(index)
+        allocation = self.allocation
+        if allocation is None:
+            allocation = allocate({stratum: len(indexes) for stratum, indexes in strata.items()},
+                                  self.get_target(len(mutants)), self.seed)
+        selected = []
+        for stratum, indexes in strata.items():
+            indexes.sort(key=lambda index: get_rank(self.seed, operators.get_mutations_id(module_name, mutants[index])))
+            selected += indexes[:allocation.get(stratum, 0)]
+        return [mutants[index] for index in sorted(selected)]
@@ -0,0 +1,226 @@
+import ast
+import copy
+import marshal
+from mutpy import utils
+
+ACTIVE_MUTANT_NAME = '__mutpy_active__'
+
+
+def create_number(value):
+    if hasattr(ast, 'Constant'):
+        return ast.Constant(value=value)
+    return ast.Num(n=value)
+
+
+def is_docstring(node):
+    return isinstance(node, ast.Expr) and isinstance(getattr(node.value, 'value', getattr(node.value, 's', None)), str)
+
+
+class ScopeSignature(ast.NodeVisitor):
+
+    def __init__(self, body):
+        self.bound_names = set()
+        self.declared_names = set()
+        self.has_yield = False
+        for node in body:
+            self.visit(node)
+
+    def as_tuple(self):
+        return self.bound_names, self.declared_names, self.has_yield
+
+    def visit_Name(self, node):
+        if not isinstance(node.ctx, ast.Load):
+            self.bound_names.add(node.id)
+
+    def visit_alias(self, node):
+        self.bound_names.add((node.asname or node.name).split('.')[0])
+
+    def visit_ExceptHandler(self, node):
+        if isinstance(node.name, str):
+            self.bound_names.add(node.name)
+        self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self.declared_names.update(node.names)
+
+    visit_Nonlocal = visit_Global
+
+    def visit_Yield(self, node):
+        self.has_yield = True
+        self.generic_visit(node)
+
+    visit_YieldFrom = visit_Yield
+
+    def visit_nested_scope(self, node):
+        if not isinstance(node, ast.Lambda):
+            self.bound_names.add(node.name)
+        for field in ['decorator_list', 'bases', 'keywords', 'args', 'returns']:
+            value = getattr(node, field, None)
+            for child in value if isinstance(value, list) else [value]:
+                if isinstance(child, ast.AST):
+                    self.visit(child)
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_ClassDef = visit_Lambda = visit_nested_scope
+
+    def visit_arguments(self, node):
+        for field in ['defaults', 'kw_defaults']:
+            for child in getattr(node, field, None) or []:
+                if child is not None:
+                    self.visit(child)
+
+
+class SchemaMutant:
+
+    def __init__(self, mutant_id, bodies):
+        self.mutant_id = mutant_id
+        self.bodies = bodies
+        self.original_bodies = {}
+
+
+class MutantSchema:
+
+    def __init__(self, target_ast, module_name):
+        self.target_ast = target_ast
+        self.module_name = module_name
+        self.current_mutant = None
+        self.code = None
+
+    @property
+    def mutant_id(self):
+        return self.current_mutant.mutant_id if self.current_mutant else None
+
+    def mutate(self, mutants):
+        module_body = set(self.target_ast.body)
+        collected_mutants = []
+        for mutations, _ in mutants:
+            mutant = self.snapshot(len(collected_mutants) + 1, mutations, module_body)
+            collected_mutants.append((mutations, mutant))
+        schema_mutants = [mutant for _, mutant in collected_mutants if mutant.mutant_id]
+        for mutant in schema_mutants:
+            if not self.is_compatible(mutant):
+                mutant.mutant_id = None
+        self.code = self.compile([mutant for mutant in schema_mutants if mutant.mutant_id])
+        try:
+            for mutations, mutant in collected_mutants:
+                self.current_mutant = mutant if self.code and mutant.mutant_id else None
+                yield mutations, self.apply(mutant)
+                self.restore(mutant)
+        finally:
+            self.current_mutant = None
+
+    def snapshot(self, mutant_id, mutations, module_body):
+        scopes = {utils.get_function_scope(mutation.node) for mutation in mutations}
+        if None in scopes:
+            changed_nodes = {self.get_statement(self.target_ast, mutation.node) for mutation in mutations}
+            body = [copy.deepcopy(node, memo={id(self.target_ast): self.target_ast})
+                    if node in changed_nodes or node not in module_body else node for node in self.target_ast.body]
+            return SchemaMutant(None, bodies={self.target_ast: body})
+        bodies = {}
+        for scope in scopes:
+            changed_nodes = {self.get_statement(scope, mutation.node) for mutation in mutations}
+            bodies[scope] = [copy.deepcopy(node, memo={id(scope): scope}) if node in changed_nodes else node
+                             for node in scope.body]
+        return SchemaMutant(mutant_id, bodies=bodies)
+
+    @staticmethod
+    def get_statement(scope, node):
+        while getattr(node, 'parent', None) not in (None, scope):
+            node = node.parent
+        return node
+
+    def apply(self, mutant):
+        for scope, body in mutant.bodies.items():
+            mutant.original_bodies[scope] = scope.body
+            scope.body = body
+        return self.target_ast
+
+    def restore(self, mutant):
+        for scope, body in mutant.original_bodies.items():
+            scope.body = body
+        mutant.original_bodies = {}
+
+    def compile(self, mutants):
+        if not mutants:
+            return None
+        try:
+            return self.compile_meta_ast(mutants)
+        except Exception:
+            self.remove_invalid_mutants(mutants)
+        mutants = [mutant for mutant in mutants if mutant.mutant_id]
+        try:
+            return self.compile_meta_ast(mutants) if mutants else None
+        except Exception:
+            return None
+
+    def remove_invalid_mutants(self, mutants):
+        if len(mutants) == 1:
+            mutants[0].mutant_id = None
+            return
+        middle = len(mutants) // 2
+        for part in [mutants[:middle], mutants[middle:]]:
+            try:
+                self.compile_meta_ast(part)
+            except Exception:
+                self.remove_invalid_mutants(part)
+
+    def compile_meta_ast(self, mutants):
+        scopes_mutants = {}
+        for mutant in mutants:
+            for scope in mutant.bodies:
+                scopes_mutants.setdefault(scope, []).append(mutant)
+        original_bodies = {}
+        try:
+            for scope, scope_mutants in scopes_mutants.items():
+                original_bodies[scope] = scope.body
+                scope.body = self.create_meta_body(
+                    scope.body,
+                    [(mutant.mutant_id, mutant.bodies[scope]) for mutant in scope_mutants],
+                )
+            return marshal.dumps(compile(self.target_ast, self.module_name, 'exec'))
+        finally:
+            for scope, body in original_bodies.items():
+                scope.body = body
+
+    def is_compatible(self, mutant):
+        for scope, body in mutant.bodies.items():
+            if scope.body and is_docstring(scope.body[0]):
+                if not body or ast.dump(body[0]) != ast.dump(scope.body[0]):
+                    return False
+            original_signature = ScopeSignature(scope.body).as_tuple()
+            bound_names, declared_names, has_yield = ScopeSignature(body).as_tuple()
+            if not bound_names <= original_signature[0] or (declared_names, has_yield) != original_signature[1:]:
+                return False
+        return True
+
+    def create_meta_body(self, body, mutant_bodies):
+        docstring = []
+        if body and is_docstring(body[0]):
+            docstring = body[:1]
+            body = body[1:]
+            mutant_bodies = [(mutant_id, mutant_body[1:]) for mutant_id, mutant_body in mutant_bodies]
+        mutant_bodies = [(mutant_id, mutant_body or [ast.Pass()]) for mutant_id, mutant_body in mutant_bodies]
+        switch = ast.If(
+            test=ast.Compare(
+                left=ast.Name(id=ACTIVE_MUTANT_NAME, ctx=ast.Load()),
+                ops=[ast.In()],
+                comparators=[ast.Set(elts=[create_number(mutant_id) for mutant_id, _ in mutant_bodies])],
+            ),
+            body=self.create_dispatch(sorted(mutant_bodies, key=lambda mutant_body: mutant_body[0])),
+            orelse=body or [ast.Pass()],
+        )
+        ast.fix_missing_locations(ast.copy_location(switch, (body or docstring or mutant_bodies[0][1])[0]))
+        return docstring + [switch]
+
+    def create_dispatch(self, mutant_bodies):
+        if len(mutant_bodies) == 1:
+            return mutant_bodies[0][1]
+        middle = len(mutant_bodies) // 2
+        return [ast.If(
+            test=ast.Compare(
+                left=ast.Name(id=ACTIVE_MUTANT_NAME, ctx=ast.Load()),
+                ops=[ast.Lt()],
+                comparators=[create_number(mutant_bodies[middle][0])],
+            ),
+            body=self.create_dispatch(mutant_bodies[:middle]),
+            orelse=self.create_dispatch(mutant_bodies[middle:]),
+        )]
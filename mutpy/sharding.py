@@ -0,0 +1,136 @@
+import heapq
+import math
+from mutpy import operators
+
+TIME_UNIT = 0.001
+
+
+def parse_shard(value, tests_durations=None):
+    index, separator, count = value.partition('/')
+    if not separator:
+        raise ValueError('shard should be INDEX/COUNT, got {}'.format(value))
+    index, count = int(index), int(count)
+    if not 0 < index <= count:
+        raise ValueError('shard index should be between 1 and {}, got {}'.format(count, index))
+    return Shard(index, count, tests_durations)
+
+
+def get_test_weight(duration):
+    return 2 ** max(0, round(math.log2(max(duration, TIME_UNIT) / TIME_UNIT)))
+
+
+def get_mutant_cost(test_ids, tests_weights):
+    return 1 + sum(tests_weights.get(test_id, 1) for test_id in test_ids)
+
+
+def partition(mutants_costs, count):
+    shards = [set() for _ in range(count)]
+    loads = [(0, index) for index in range(count)]
+    for mutant_id, cost in sorted(mutants_costs.items(), key=lambda item: (-item[1], item[0])):
+        load, index = heapq.heappop(loads)
+        shards[index].add(mutant_id)
+        heapq.heappush(loads, (load + cost, index))
+    return shards
+
+
+class Shard:
+
+    def __init__(self, index, count, tests_durations=None):
+        self.index = index
+        self.count = count
+        self.tests_weights = {test_id: get_test_weight(duration)
+                              for test_id, duration in (tests_durations or {}).items()}
+        self.mutants_costs = {}
+        self.mutants_ids = None
+        self.skipped_mutants = 0
+
+    def __str__(self):
+        return '{}/{}'.format(self.index, self.count)
+
+    def add_mutant(self, module_name, mutations, cost):
+        self.mutants_costs[operators.get_mutations_id(module_name, mutations)] = cost
+
+    def plan(self):
+        self.mutants_ids = partition(self.mutants_costs, self.count)[self.index - 1]
+
+    def filter(self, module_name, mutants):
+        for mutations, mutant in mutants:
+            if operators.get_mutations_id(module_name, mutations) in self.mutants_ids:
+                yield mutations, mutant
+            else:
+                self.skipped_mutants += 1
+
+
+def check_shards(reports):
+    shards = [report.get('shard') for report in reports]
+    if not all(shards):
+        return None
+    count = shards[0]['count']
+    indexes = sorted(shard['index'] for shard in shards)
+    if any(shard['count'] != count or shard['all_mutants'] != shards[0]['all_mutants'] for shard in shards):
+        raise ValueError('reports come from different shardings')
+    if indexes != list(range(1, count + 1)):
+        raise ValueError('expected reports of shards 1-{}, got {}'.format(count, ', '.join(map(str, indexes))))
+    return shards[0]['all_mutants']
+
+
+def merge_coverage(reports):
+    modules = {}
+    for report in reports:
+        coverage = report.get('coverage') or {}
+        for module_name, module_coverage in (coverage.get('modules') or {}).items():
+            modules.setdefault(module_name, module_coverage)
+    if not modules:
+        return max(((report['coverage']['covered_nodes'], report['coverage']['all_nodes']) for report in reports),
+                   key=lambda coverage: coverage[1], default=(0, 0)), {}
+    covered_nodes = sum(covered_nodes for covered_nodes, _ in modules.values())
+    all_nodes = sum(all_nodes for _, all_nodes in modules.values())
+    return (covered_nodes, all_nodes), modules
+
+
+def merge_reports(reports, score):
+    all_mutants = check_shards(reports)
+    mutations = []
+    mutations_ids = set()
+    for report in reports:
+        report_ids = {mutation['id'] for mutation in report['mutations']}
+        if report_ids & mutations_ids:
+            raise ValueError('reports contain the same mutants')
+        mutations_ids |= report_ids
+        mutations += report['mutations']
+    if all_mutants is not None and len(mutations_ids) != all_mutants:
+        raise ValueError('shards cover {} of {} mutants'.format(len(mutations_ids), all_mutants))
+    for number, mutation in enumerate(mutations, start=1):
+        mutation['number'] = number
+        if mutation['status'] == 'killed':
+            score.inc_killed(tests_run=mutation['tests_run'] or 0)
+        else:
+            getattr(score, 'inc_' + mutation['status'])()
+    for report in reports:
+        score.inc_population(report.get('population_mutants') or 0)
+    (covered_nodes, all_nodes), modules_coverage = merge_coverage(reports)
+    score.update_coverage(covered_nodes, all_nodes)
+    targets = []
+    tests = {}
+    time_stats = {}
+    for report in reports:
+        targets += [target for target in report['targets'] if target not in targets]
+        for test in report['tests']:
+            tests.setdefault(test['name'], test)
+        for name, time in (report.get('time_stats') or {}).items():
+            time_stats[name] = time_stats.get(name, 0) + time
+    return {
+        'targets': targets,
+        'tests': list(tests.values()),
+        'number_of_tests': max(report['number_of_tests'] for report in reports),
+        'mutations': mutations,
+        'total_time': sum(report['total_time'] for report in reports),
+        'time_stats': time_stats,
+        'mutation_score': score.count(),
+        'population_mutants': score.population_mutants,
+        'coverage': {
+            'covered_nodes': covered_nodes,
+            'all_nodes': all_nodes,
+            'modules': modules_coverage,
+        },
+    }
@@ -0,0 +1,82 @@
+import functools
+import os
+import unittest
+from mutpy import controller, operators, utils
+
+FUNCTION_TEMPLATE = """
+def f{0}(a, b):
+    if a > b and b < {0}:
+        c = a + b * {0}
+    else:
+        c = a - b
+    while c > {0}:
+        c = c // 2
+    return c or a
+"""
+
+
+def generate_module_source(lines):
+    function_lines = FUNCTION_TEMPLATE.count('\n')
+    return ''.join(FUNCTION_TEMPLATE.format(index) for index in range(lines // function_lines))
+
+
+def measure(function, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        timer = utils.Timer()
+        function(*args)
+        duration = timer.stop()
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+@unittest.skipUnless(os.environ.get('MUTPY_BENCHMARK'), 'set MUTPY_BENCHMARK=1 to run scaling benchmarks')
+class ScalingBenchmark(unittest.TestCase):
+    LINES = 10000
+    MAX_GROWTH = 3
+    OPERATORS = [
+        operators.ArithmeticOperatorReplacement,
+        operators.ConditionalOperatorInsertion,
+        operators.LogicalConnectorReplacement,
+        operators.RelationalOperatorReplacement,
+    ]
+    HOM_STRATEGIES = [
+        controller.FirstToLastHOMStrategy,
+        controller.EachChoiceHOMStrategy,
+        controller.BetweenOperatorsHOMStrategy,
+        functools.partial(controller.RandomHOMStrategy, seed=0),
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sources = [generate_module_source(cls.LINES), generate_module_source(2 * cls.LINES)]
+        cls.mutations = [cls.list_mutations(utils.create_ast(source)) for source in cls.sources]
+
+    @classmethod
+    def list_mutations(cls, target_ast):
+        return controller.FirstOrderMutator(cls.OPERATORS).generate_all_mutations(None, None, target_ast, None)
+
+    def assert_linear_growth(self, name, durations):
+        small, large = durations
+        self.assertLess(large, self.MAX_GROWTH * small, '{}: {:.3f}s for {} lines, {:.3f}s for {} lines'.format(
+            name, small, self.LINES, large, 2 * self.LINES))
+
+    def test_create_ast(self):
+        durations = [measure(utils.create_ast, source) for source in self.sources]
+
+        self.assert_linear_growth('create_ast', durations)
+
+    def test_list_mutations(self):
+        durations = [measure(lambda source: self.list_mutations(utils.create_ast(source)), source)
+                     for source in self.sources]
+
+        self.assert_linear_growth('list mutations', durations)
+
+    def test_generate_high_order_mutations(self):
+        for hom_strategy in self.HOM_STRATEGIES:
+            for order in [2, 3, 4]:
+                strategy = hom_strategy(order=order)
+                durations = [measure(lambda mutations: list(strategy.generate(mutations)), mutations)
+                             for mutations in self.mutations]
+
+                self.assert_linear_growth('{} order {}'.format(strategy.name, order), durations)
@@ -0,0 +1,121 @@
+import ast
+import os
+import shutil
+import tempfile
+import unittest
+from mutpy import cache, operators, utils
+
+
+class GetMutantKeyTest(unittest.TestCase):
+
+    SOURCE = utils.f("""
+    def add(x, y):
+        return x + y
+
+    def sub(x, y):
+        return x - y
+    """)
+
+    def get_keys(self, source, tests=()):
+        target_ast = utils.create_ast(source)
+        operator = operators.ArithmeticOperatorReplacement()
+        return [cache.get_mutant_key('target', mutant, [mutation], list(tests))
+                for mutation, mutant in operator.mutate(target_ast)]
+
+    def test_same_key_for_same_mutant(self):
+        self.assertEqual(self.get_keys(self.SOURCE), self.get_keys(self.SOURCE))
+
+    def test_different_keys_for_different_mutants(self):
+        keys = self.get_keys(self.SOURCE)
+
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_change_key_only_of_changed_function(self):
+        keys = self.get_keys(self.SOURCE)
+
+        changed_keys = self.get_keys('\n' + self.SOURCE.replace('x - y', 'y - x'))
+
+        self.assertEqual(len(keys), 2)
+        self.assertEqual(keys[0], changed_keys[0])
+        self.assertNotEqual(keys[1], changed_keys[1])
+
+    def test_different_keys_for_same_functions_of_different_classes(self):
+        keys = self.get_keys(utils.f("""
+        class A:
+            def f(self):
+                return 1 + 2
+
+        class B:
+            def f(self):
+                return 1 + 2
+        """))
+
+        self.assertEqual(len(keys), 2)
+        self.assertNotEqual(keys[0], keys[1])
+
+    def test_change_key_if_tests_changed(self):
+        self.assertNotEqual(self.get_keys(self.SOURCE, [('test', 'a')]), self.get_keys(self.SOURCE, [('test', 'b')]))
+
+
+class ResultsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for file_name in os.listdir(self.cache_dir):
+            os.remove(os.path.join(self.cache_dir, file_name))
+        os.rmdir(self.cache_dir)
+
+    def test_save_and_load(self):
+        results_cache = cache.ResultsCache(self.cache_dir)
+        results_cache.set('key', None, 1)
+        results_cache.save()
+
+        results_cache = cache.ResultsCache(self.cache_dir)
+
+        self.assertEqual(results_cache.get('key'), (None, 1))
+        self.assertIsNone(results_cache.get('other'))
+
+    def test_drop_not_picklable_exception(self):
+        results_cache = cache.ResultsCache(self.cache_dir)
+        result = utils.SerializableMutationTestResult(True, False, None, None, TypeError(lambda: None), 0, None)
+
+        results_cache.set('key', result, 1)
+        results_cache.save()
+
+        self.assertIsNone(cache.ResultsCache(self.cache_dir).get('key')[0].exception)
+
+
+class ASTCacheTest(unittest.TestCase):
+
+    SOURCE = 'def add(x, y):\n    return x + y\n'
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_create_and_load(self):
+        ast_cache = cache.ASTCache(self.cache_dir)
+        target_ast = ast_cache.create_ast(self.SOURCE)
+
+        cached_ast = cache.ASTCache(self.cache_dir).get(self.SOURCE)
+
+        self.assertEqual(ast.dump(cached_ast), ast.dump(target_ast))
+        return_node = cached_ast.body[0].body[0]
+        self.assertIs(return_node.value.parent, return_node)
+        self.assertEqual(return_node.interval, target_ast.body[0].body[0].interval)
+        self.assertTrue(utils.is_ancestor(cached_ast.body[0], return_node.value.op))
+
+    def test_miss_if_source_changed(self):
+        ast_cache = cache.ASTCache(self.cache_dir)
+        ast_cache.create_ast(self.SOURCE)
+
+        self.assertIsNone(ast_cache.get(self.SOURCE.replace('+', '-')))
+
+    def test_return_new_tree_for_each_call(self):
+        ast_cache = cache.ASTCache(self.cache_dir)
+
+        self.assertIsNot(ast_cache.create_ast(self.SOURCE), ast_cache.create_ast(self.SOURCE))
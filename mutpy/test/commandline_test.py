@@ -1,5 +1,7 @@
+import os
+import tempfile
 import unittest
-from mutpy import commandline
+from mutpy import commandline, operators
 
 
 class CommandLineTest(unittest.TestCase):
@@ -18,3 +20,24 @@ class CommandLineTest(unittest.TestCase):
         mutator = commandline.build_mutator(
             parser.parse_args(['--operator', 'AOR']))
         self.assertEqual(1, len(mutator.operators))
+
+    def test_build_mutator_with_sufficient_set(self):
+        parser = commandline.build_parser()
+        mutator = commandline.build_mutator(
+            parser.parse_args(['--operator', 'AOR', 'ROR', '--sufficient-set']))
+        self.assertEqual({operators.ArithmeticOperatorReplacement, operators.SufficientRelationalOperatorReplacement},
+                         mutator.operators)
+
+    def test_load_shard_timings(self):
+        with tempfile.TemporaryDirectory() as timings_dir:
+            file_name = os.path.join(timings_dir, 'timings.yaml')
+            with open(file_name, 'w') as timings_file:
+                timings_file.write('test.A.test_a: 0.5\ntest.A.test_b: 2\n')
+
+            self.assertEqual(commandline.load_shard_timings(file_name), {'test.A.test_a': 0.5, 'test.A.test_b': 2})
+
+            with open(file_name, 'w') as timings_file:
+                timings_file.write('- test.A.test_a\n')
+
+            with self.assertRaises(ValueError):
+                commandline.load_shard_timings(file_name)
@@ -1,8 +1,10 @@
 import ast
+import os
+import tempfile
 import unittest
 import types
 import sys
-from mutpy import controller, operators, utils, codegen
+from mutpy import controller, operators, utils, codegen, cache, sharding
 
 
 class MutationScoreTest(unittest.TestCase):
@@ -34,6 +36,14 @@ class MutationScoreTest(unittest.TestCase):
 
         self.assertEqual(self.score.count(), 50)
 
+    def test_count_if_equivalent(self):
+        self.score.survived_mutants = 5
+        self.score.killed_mutants = 5
+        self.score.inc_equivalent()
+
+        self.assertEqual(self.score.count(), 50)
+        self.assertEqual(self.score.all_mutants, 11)
+
     def test_count_if_timeout(self):
         self.score.survived_mutants = 5
         self.score.killed_mutants = 4
@@ -47,6 +57,79 @@ class MutationScoreTest(unittest.TestCase):
         self.assertEqual(self.score.covered_nodes, 1)
         self.assertEqual(self.score.all_nodes, 1)
 
+    def test_tests_run_per_killed(self):
+        self.score.inc_killed(tests_run=1)
+        self.score.inc_killed(tests_run=4)
+
+        self.assertEqual(self.score.tests_run_per_killed(), 2.5)
+
+    def test_confidence_interval_if_not_sampled(self):
+        self.score.killed_mutants = 5
+        self.score.survived_mutants = 5
+        self.score.inc_population(10)
+
+        self.assertIsNone(self.score.confidence_interval())
+
+    def test_confidence_interval(self):
+        self.score.killed_mutants = 8
+        self.score.survived_mutants = 2
+        self.score.inc_population(100)
+
+        lower, upper = self.score.confidence_interval()
+
+        self.assertLess(lower, self.score.count())
+        self.assertGreater(upper, self.score.count())
+        self.score.inc_population(900)
+        wider_lower, wider_upper = self.score.confidence_interval()
+        self.assertLess(wider_lower, lower)
+        self.assertGreater(wider_upper, upper)
+
+
+class KillHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.history = controller.KillHistory()
+        node = utils.create_ast('x + y').body[0].value
+        self.mutation = operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=node)
+        other_node = utils.create_ast('\nx + y').body[0].value
+        self.other_mutation = operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=other_node)
+
+    def sort_tests(self, mutation, test_costs):
+        return self.history.sort_tests(list(test_costs), 'target', [mutation], test_costs)
+
+    def test_sort_cheaper_tests_first(self):
+        test_costs = {'a': 2, 'b': 1, 'c': 3}
+
+        self.assertEqual(self.sort_tests(self.mutation, test_costs), ['b', 'a', 'c'])
+
+    def test_sort_killers_of_same_node_first(self):
+        self.history.add_kill('target', [self.other_mutation], 'b')
+        self.history.add_kill('target', [self.mutation], 'c')
+        test_costs = {'a': 1, 'b': 1, 'c': 2}
+
+        self.assertEqual(self.sort_tests(self.mutation, test_costs), ['c', 'b', 'a'])
+        self.assertEqual(self.sort_tests(self.other_mutation, test_costs), ['b', 'c', 'a'])
+
+    def test_apply_numbered_kills_later(self):
+        self.history.add_kill('target', [self.mutation], 'c', mutation_number=3)
+        test_costs = {'a': 1, 'c': 2}
+
+        self.history.apply_kills(2)
+        self.assertEqual(self.sort_tests(self.mutation, test_costs), ['a', 'c'])
+        self.history.apply_kills(3)
+        self.assertEqual(self.sort_tests(self.mutation, test_costs), ['c', 'a'])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as history_dir:
+            file_name = os.path.join(history_dir, 'history')
+            history = controller.KillHistory(file_name)
+            history.add_kill('target', [self.mutation], 'c')
+            history.save()
+
+            self.history = controller.KillHistory(file_name)
+
+        self.assertEqual(self.sort_tests(self.mutation, {'a': 1, 'c': 2}), ['c', 'a'])
+
 
 class MockModulesLoader:
 
@@ -71,6 +154,12 @@ class MockMutationController(controller.MutationController):
     def create_target_ast(self, target_module):
         return utils.create_ast(self.target_loader.get_source())
 
+    def get_module_source(self, module):
+        for loader in [self.target_loader, self.test_loader]:
+            if module is loader.module:
+                return loader.get_source()
+        return super().get_module_source(module)
+
 
 class MutationScoreStoreView:
 
@@ -78,6 +167,34 @@ class MutationScoreStoreView:
         self.score = score
 
 
+class SurvivedTestsRunStoreView:
+
+    def __init__(self):
+        self.tests_run = []
+
+    def survived(self, time, tests_run, *args, **kwargs):
+        self.tests_run.append(tests_run)
+
+
+class KilledTestsRunStoreView:
+
+    def __init__(self):
+        self.tests_run = []
+
+    def killed(self, time, killer, exception_traceback, tests_run, *args, **kwargs):
+        self.tests_run.append((killer, tests_run))
+
+
+class MutantsStoreView:
+    needs_mutant_source = True
+
+    def __init__(self):
+        self.mutants = []
+
+    def mutation(self, number, mutations, module, mutant):
+        self.mutants.append(mutant)
+
+
 class MutationControllerTest(unittest.TestCase):
     TARGET_SRC = 'def mul(x): return x * x'
     TEST_SRC = utils.f("""
@@ -111,14 +228,333 @@ class MutationControllerTest(unittest.TestCase):
         self.assertEqual(score.killed_mutants, 2)
         self.assertEqual(score.survived_mutants, 1)
 
+    def test_run_killers_first(self):
+        self.mutation_controller.test_loader = MockModulesLoader('test', utils.f("""
+        import time
+        import target
+        from unittest import TestCase
+        class MulTest(TestCase):
+            def test_a_slow(self):
+                time.sleep(0.01)
+            def test_mul(self):
+                self.assertEqual(target.mul(2), 4)
+        """))
+        self.mutation_controller.mutate_covered = False
+        self.mutation_controller.MIN_TEST_DURATION = 0.001
+        self.mutation_controller.prioritize_tests = False
+        self.mutation_controller.run()
+        tests_run_in_loader_order = self.score_view.score.tests_run_per_killed()
+
+        self.mutation_controller.prioritize_tests = True
+        self.mutation_controller.run()
+
+        self.assertEqual(tests_run_in_loader_order, 2)
+        self.assertEqual(self.score_view.score.tests_run_per_killed(), 1)
+
+    def test_apply_kills_after_worker_pool_size_mutants(self):
+        self.mutation_controller.target_loader = MockModulesLoader('target', utils.f("""
+        def mul(x):
+            return x * x
+        def add(x):
+            return x + x
+        def sub(x):
+            return x - x
+        """))
+        self.mutation_controller.test_loader = MockModulesLoader('test', utils.f("""
+        import time
+        import target
+        from unittest import TestCase
+        class MulTest(TestCase):
+            def test_a(self):
+                pass
+            def test_b(self):
+                time.sleep(0.01)
+                self.assertEqual((target.mul(2), target.add(2), target.sub(2)), (4, 4, 0))
+        """))
+        self.mutation_controller.mutate_covered = False
+        tests_runs = []
+        for jobs in [1, 2, 2]:
+            killed_view = KilledTestsRunStoreView()
+            self.mutation_controller.views = [killed_view]
+            self.mutation_controller.kill_history = controller.KillHistory()
+            self.mutation_controller.jobs = jobs
+            self.mutation_controller.target_loader.load()
+            self.mutation_controller.run()
+            tests_runs.append([tests_run for _, tests_run in killed_view.tests_run][:3])
+
+        self.assertEqual(tests_runs[0], [2, 1, 1])
+        self.assertEqual(tests_runs[1], [2, 2, 1])
+        self.assertEqual(tests_runs[1], tests_runs[2])
+
+    def test_run_only_covering_tests(self):
+        survived_view = SurvivedTestsRunStoreView()
+        self.mutation_controller.add_view(survived_view)
+
+        self.mutation_controller.run()
+
+        self.assertEqual(survived_view.tests_run, [1])
+
+    def test_spend_mutants_budget_on_covered_code(self):
+        self.mutation_controller.target_loader = MockModulesLoader('target', utils.f("""
+        def mul(x):
+            return x * x
+        def add(x):
+            return x + x
+        """))
+        self.mutation_controller.mutant_generator = controller.FirstOrderMutator(
+            [operators.ArithmeticOperatorReplacement], max_mutants=2)
+        self.mutation_controller.trace_coverage = True
+
+        self.mutation_controller.run()
+
+        self.assertEqual(self.score_view.score.all_mutants, 2)
+
+    def test_run_with_trace_coverage(self):
+        survived_view = SurvivedTestsRunStoreView()
+        self.mutation_controller.add_view(survived_view)
+        self.mutation_controller.trace_coverage = True
+
+        self.mutation_controller.run()
+
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 3)
+        self.assertEqual(score.killed_mutants, 2)
+        self.assertEqual(survived_view.tests_run, [1])
+        self.assertEqual(score.covered_nodes, score.all_nodes)
+
+    def test_load_tests_once(self):
+        loaded_modules = []
+        get_test_suite = self.mutation_controller.get_test_suite
+
+        def get_test_suite_and_store(test_module, target_test):
+            loaded_modules.append(test_module.__name__)
+            return get_test_suite(test_module, target_test)
+
+        self.mutation_controller.get_test_suite = get_test_suite_and_store
+        self.mutation_controller.run()
+
+        self.assertEqual(loaded_modules, ['test'])
+
+    def test_reuse_cached_results(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.mutation_controller.results_cache = cache.ResultsCache(cache_dir)
+            self.mutation_controller.run()
+            self.mutation_controller.results_cache = cache.ResultsCache(cache_dir)
+            self.mutation_controller.run_mutation_test_runner = None
+
+            self.mutation_controller.run()
+
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 3)
+        self.assertEqual(score.killed_mutants, 2)
+        self.assertEqual(score.survived_mutants, 1)
+
+    def test_set_live_time_for_each_test(self):
+        self.mutation_controller.run()
+
+        self.assertEqual(
+            sorted(self.mutation_controller.test_live_times),
+            ['test.MulTest.test_mul', 'test.MulTest.test_not_used'],
+        )
+        self.assertTrue(all(live_time > 0 for live_time in self.mutation_controller.test_live_times.values()))
+
+    def test_run_with_worker_pool(self):
+        self.mutation_controller.runner = 'pool'
+
+        self.mutation_controller.run()
+
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 3)
+        self.assertEqual(score.killed_mutants, 2)
+        self.assertEqual(score.survived_mutants, 1)
+
+    def test_run_with_fork_server(self):
+        self.mutation_controller.runner = 'forkserver'
+
+        self.mutation_controller.run()
+
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 3)
+        self.assertEqual(score.killed_mutants, 2)
+        self.assertEqual(score.survived_mutants, 1)
+
+    def test_run_with_many_jobs(self):
+        self.mutation_controller.jobs = 2
+
+        self.mutation_controller.run()
+
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 3)
+        self.assertEqual(score.killed_mutants, 2)
+        self.assertEqual(score.survived_mutants, 1)
+
+    def test_notify_mutant_source_with_many_jobs(self):
+        mutants_view = MutantsStoreView()
+        self.mutation_controller.add_view(mutants_view)
+        self.mutation_controller.jobs = 2
+
+        self.mutation_controller.run()
+
+        self.assertEqual(mutants_view.mutants, ['def mul(x):\n    return x / x', 'def mul(x):\n    return x // x',
+                                                'def mul(x):\n    return x ** x'])
+
+    def test_run_with_shards(self):
+        scores = []
+        for index in [1, 2]:
+            self.setUp()
+            self.mutation_controller.shard = sharding.Shard(index, 2)
+            self.mutation_controller.run()
+            scores.append(self.score_view.score)
+
+        self.assertEqual([score.all_mutants for score in scores], [2, 1])
+        self.assertEqual(sum(score.killed_mutants for score in scores), 2)
+        self.assertEqual(sum(score.population_mutants for score in scores), 3)
+
+    def test_run_with_one_shard_and_random_hom_strategy(self):
+        self.mutation_controller.target_loader = MockModulesLoader('target', 'def mul(x): return x * x + x - x')
+        self.mutation_controller.mutant_generator = controller.HighOrderMutator(
+            [operators.ArithmeticOperatorReplacement],
+            hom_strategy=controller.RandomHOMStrategy(order=2, seed=0),
+        )
+        self.mutation_controller.shard = sharding.Shard(1, 1)
+
+        self.mutation_controller.run()
+
+        score = self.score_view.score
+        self.assertEqual((len(self.mutation_controller.shard.mutants_ids), score.all_mutants), (3, 3))
+
+    def test_run_with_schemata(self):
+        self.mutation_controller.schemata = True
+        get_schema_module = self.mutation_controller.get_schema_module
+        mutant_ids = []
+
+        def get_schema_module_spy(module_name, code, mutant_id=0):
+            mutant_ids.append(mutant_id)
+            return get_schema_module(module_name, code, mutant_id)
+
+        self.mutation_controller.get_schema_module = get_schema_module_spy
+
+        self.mutation_controller.run()
+
+        self.assertEqual(mutant_ids, [1, 2, 3])
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 3)
+        self.assertEqual(score.killed_mutants, 2)
+        self.assertEqual(score.survived_mutants, 1)
+
+    def test_run_with_hot_patch(self):
+        self.mutation_controller.hot_patch = True
+        target_module = self.mutation_controller.target_loader.module
+
+        self.mutation_controller.run()
+
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 3)
+        self.assertEqual(score.killed_mutants, 2)
+        self.assertEqual(score.survived_mutants, 1)
+        self.assertEqual(target_module.mul(2), 4)
+
+    def test_restore_hot_patch_after_interrupt(self):
+        self.mutation_controller.hot_patch = True
+        target_module = self.mutation_controller.target_loader.module
+
+        def interrupt(*args, **kwargs):
+            raise KeyboardInterrupt()
+
+        self.mutation_controller.run_tests_with_mutant = interrupt
+
+        self.mutation_controller.run()
+
+        self.assertEqual(target_module.mul(2), 4)
+
+    def test_run_with_hot_patch_in_worker_pool(self):
+        self.mutation_controller.hot_patch = True
+        self.mutation_controller.runner = 'pool'
+
+        self.mutation_controller.run()
+
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 3)
+        self.assertEqual(score.killed_mutants, 2)
+        self.assertEqual(score.survived_mutants, 1)
+
+    def test_run_with_schemata_in_worker_pool(self):
+        self.mutation_controller.schemata = True
+        self.mutation_controller.runner = 'pool'
+
+        self.mutation_controller.run()
+
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 3)
+        self.assertEqual(score.killed_mutants, 2)
+        self.assertEqual(score.survived_mutants, 1)
+
+    def create_tce_controller(self, **kwargs):
+        target_loader = MockModulesLoader('target', 'def mul(x): return x * (1 * 2 * 2)')
+        test_loader = MockModulesLoader('test', utils.f("""
+        import target
+        from unittest import TestCase
+        class MulTest(TestCase):
+            def test_mul(self):
+                self.assertEqual(target.mul(2), 8)
+        """))
+        mutator = controller.FirstOrderMutator([operators.ArithmeticOperatorReplacement], percentage=100)
+        return MockMutationController(
+            target_loader=target_loader,
+            test_loader=test_loader,
+            views=[self.score_view],
+            mutant_generator=mutator,
+            tce=True,
+            **kwargs
+        )
+
+    def test_skip_equivalent_and_duplicated_mutants(self):
+        mutation_controller = self.create_tce_controller()
+        run_mutation_test_runner = mutation_controller.run_mutation_test_runner
+        runs = []
+
+        def run_mutation_test_runner_spy(suite, total_duration):
+            runs.append(suite)
+            return run_mutation_test_runner(suite, total_duration)
+
+        mutation_controller.run_mutation_test_runner = run_mutation_test_runner_spy
+
+        mutation_controller.run()
+
+        self.assertEqual(len(runs), 7)
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 9)
+        self.assertEqual(score.killed_mutants, 8)
+        self.assertEqual(score.equivalent_mutants, 1)
+        self.assertEqual(score.count(), 100)
+
+    def test_skip_equivalent_and_duplicated_mutants_in_worker_pool(self):
+        mutation_controller = self.create_tce_controller(runner='pool')
+        tasks = []
+        create_mutation_task = mutation_controller.create_mutation_task
+
+        def create_mutation_task_spy(*args, **kwargs):
+            tasks.append(args)
+            return create_mutation_task(*args, **kwargs)
+
+        mutation_controller.create_mutation_task = create_mutation_task_spy
+
+        mutation_controller.run()
+
+        self.assertEqual(len(tasks), 7)
+        score = self.score_view.score
+        self.assertEqual(score.all_mutants, 9)
+        self.assertEqual(score.killed_mutants, 8)
+        self.assertEqual(score.equivalent_mutants, 1)
+
 
 class FirstToLastHOMStrategyTest(unittest.TestCase):
 
     def test_generate(self):
         mutations = [
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
         ]
         hom_strategy = controller.FirstToLastHOMStrategy(order=2)
 
@@ -148,9 +584,9 @@ class FirstToLastHOMStrategyTest(unittest.TestCase):
         self.assertEqual(changes_to_apply[1][0], mutations[1])
 
     def test_generate_if_node_child(self):
-        node = ast.Sub(children=[])
+        node = ast.Sub(interval=(1, 2))
         mutations = [
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.UnaryOp(children=[node])),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.UnaryOp(interval=(0, 2))),
             operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=node),
         ]
         hom_strategy = controller.FirstToLastHOMStrategy(order=2)
@@ -168,9 +604,9 @@ class EachChoiceHOMStrategyTest(unittest.TestCase):
 
     def test_generate(self):
         mutations = [
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
         ]
         hom_strategy = controller.EachChoiceHOMStrategy(order=2)
 
@@ -183,13 +619,27 @@ class EachChoiceHOMStrategyTest(unittest.TestCase):
         self.assertEqual(len(changes_to_apply[1]), 1)
         self.assertEqual(changes_to_apply[1][0], mutations[2])
 
+    def test_generate_if_node_descendant(self):
+        node = ast.Sub(interval=(3, 4))
+        mutations = [
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(interval=(0, 1))),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=node),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.BinOp(interval=(1, 4))),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+        ]
+        hom_strategy = controller.EachChoiceHOMStrategy(order=3)
+
+        changes_to_apply = list(hom_strategy.generate(mutations))
+
+        self.assertEqual(changes_to_apply, [[mutations[0], mutations[1], mutations[3]], [mutations[2]]])
+
 
 class BetweenOperatorsHOMStrategyTest(unittest.TestCase):
 
     def test_generate_if_one_operator(self):
         mutations = [
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
         ]
         hom_strategy = controller.BetweenOperatorsHOMStrategy(order=2)
 
@@ -203,9 +653,9 @@ class BetweenOperatorsHOMStrategyTest(unittest.TestCase):
 
     def test_generate_if_two_operators(self):
         mutations = [
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.AssignmentOperatorReplacement, node=ast.Sub(children=[])),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.AssignmentOperatorReplacement, node=ast.Sub()),
         ]
         hom_strategy = controller.BetweenOperatorsHOMStrategy(order=2)
 
@@ -221,10 +671,10 @@ class BetweenOperatorsHOMStrategyTest(unittest.TestCase):
 
     def test_generate_if_three_operators(self):
         mutations = [
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.AssignmentOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.ConstantReplacement, node=ast.Sub(children=[])),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.AssignmentOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.ConstantReplacement, node=ast.Sub()),
         ]
         hom_strategy = controller.BetweenOperatorsHOMStrategy(order=2)
 
@@ -243,9 +693,9 @@ class RandomHOMStrategyTest(unittest.TestCase):
 
     def test_generate(self):
         mutations = [
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
-            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(children=[])),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub()),
         ]
 
         def shuffler(mutations):
@@ -262,6 +712,18 @@ class RandomHOMStrategyTest(unittest.TestCase):
         self.assertEqual(len(changes_to_apply[1]), 1)
         self.assertEqual(changes_to_apply[1][0], mutations[0])
 
+    def test_generate_same_order_for_module(self):
+        mutations = [
+            operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=ast.Sub(), visitor=str(i))
+            for i in range(5)
+        ]
+        hom_strategy = controller.RandomHOMStrategy(order=1, seed=1)
+
+        first = list(hom_strategy.generate(mutations, 'target'))
+        second = list(hom_strategy.generate(mutations, 'target'))
+
+        self.assertEqual(first, second)
+
 
 class FirstOrderMutatorTest(unittest.TestCase):
 
@@ -283,6 +745,29 @@ class FirstOrderMutatorTest(unittest.TestCase):
 
         self.assertEqual(codegen.to_source(target_ast), 'x += y + z')
 
+    def test_count_pruned_mutants(self):
+        mutator = controller.FirstOrderMutator(
+            operators=[operators.SufficientRelationalOperatorReplacement,
+                       operators.SufficientLogicalConnectorReplacement],
+        )
+        target_ast = utils.create_ast('x < y and y >= z')
+
+        mutants = list(mutator.mutate(target_ast))
+
+        self.assertEqual(len(mutants), 9)
+        self.assertEqual(mutator.pruned_mutants, 3 - 7)
+
+    def test_sample_mutants(self):
+        source = 'x = a + b - c * d / e'
+        mutator = controller.FirstOrderMutator([operators.ArithmeticOperatorReplacement], percentage=50, seed=1)
+
+        mutants = [codegen.to_source(mutant) for _, mutant in mutator.mutate(utils.create_ast(source))]
+
+        self.assertEqual(len(mutants), 4)
+        self.assertEqual(mutator.population_mutants, 7)
+        mutator = controller.FirstOrderMutator([operators.ArithmeticOperatorReplacement], percentage=50, seed=1)
+        self.assertEqual([codegen.to_source(mutant) for _, mutant in mutator.mutate(utils.create_ast(source))], mutants)
+
 
 class HighOrderMutatorTest(unittest.TestCase):
 
@@ -195,6 +195,137 @@ class CoverageInjectorTest(unittest.TestCase):
         self.assertTrue(self.coverage_injector.is_covered(else_body_el))
 
 
+class CoverageTracerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.coverage_tracer = coverage.CoverageTracer()
+
+    def test_covered_node(self):
+        node = utils.create_ast('x = 1\nif False:\n\ty = 2')
+
+        self.coverage_tracer.inject(node)
+
+        assign_node = node.body[0]
+        constant_node = node.body[0].targets[0]
+        not_covered_node = node.body[1].body[0]
+        self.assertTrue(self.coverage_tracer.is_covered(assign_node))
+        self.assertTrue(self.coverage_tracer.is_covered(constant_node))
+        self.assertFalse(self.coverage_tracer.is_covered(not_covered_node))
+
+    def test_result(self):
+        node = utils.create_ast('x = 1')
+
+        self.coverage_tracer.inject(node)
+
+        covered_nodes, all_nodes = self.coverage_tracer.get_result()
+        self.assertEqual(covered_nodes, all_nodes)
+
+    def test_future_statement_coverage(self):
+        node = utils.create_ast('from __future__ import print_function')
+
+        self.coverage_tracer.inject(node)
+
+        import_node = node.body[0]
+        self.assertFalse(self.coverage_tracer.is_covered(import_node))
+
+    def test_if_coverage(self):
+        node = utils.create_ast(utils.f("""
+        if False:
+            pass
+        elif True:
+            pass
+        else:
+            pass
+        """))
+
+        self.coverage_tracer.inject(node)
+
+        if_node = node.body[0]
+        second_if_node = if_node.orelse[0]
+        self.assertTrue(self.coverage_tracer.is_covered(if_node.test))
+        self.assertFalse(self.coverage_tracer.is_covered(if_node.body[0]))
+        self.assertTrue(self.coverage_tracer.is_covered(second_if_node.test))
+        self.assertTrue(self.coverage_tracer.is_covered(second_if_node.body[0]))
+        self.assertFalse(self.coverage_tracer.is_covered(second_if_node.orelse[0]))
+
+    def test_func_def_coverage(self):
+        node = utils.create_ast(utils.f("""
+        @staticmethod
+        def foo(x):
+            pass
+        """))
+
+        self.coverage_tracer.inject(node)
+
+        func_node = node.body[0]
+        self.assertTrue(self.coverage_tracer.is_covered(func_node))
+        self.assertTrue(self.coverage_tracer.is_covered(func_node.decorator_list[0]))
+        self.assertTrue(self.coverage_tracer.is_covered(func_node.args.args[0]))
+        self.assertFalse(self.coverage_tracer.is_covered(func_node.body[0]))
+
+    def test_except_coverage(self):
+        node = utils.create_ast(utils.f("""
+        try:
+            raise KeyError
+        except KeyError:
+            pass
+        except ValueError:
+            pass
+        """))
+
+        self.coverage_tracer.inject(node)
+
+        try_node = node.body[0]
+        self.assertTrue(self.coverage_tracer.is_covered(try_node))
+        self.assertTrue(self.coverage_tracer.is_covered(try_node.body[0]))
+        self.assertTrue(self.coverage_tracer.is_covered(try_node.handlers[0]))
+        self.assertTrue(self.coverage_tracer.is_covered(try_node.handlers[0].body[0]))
+        self.assertFalse(self.coverage_tracer.is_covered(try_node.handlers[1].body[0]))
+
+    def test_for_coverage(self):
+        node = utils.create_ast(utils.f("""
+        for x in []:
+            pass
+        else:
+            pass
+        """))
+
+        self.coverage_tracer.inject(node)
+
+        for_node = node.body[0]
+        self.assertTrue(self.coverage_tracer.is_covered(for_node.target))
+        self.assertTrue(self.coverage_tracer.is_covered(for_node.iter))
+        self.assertFalse(self.coverage_tracer.is_covered(for_node.body[0]))
+        self.assertTrue(self.coverage_tracer.is_covered(for_node.orelse[0]))
+
+    def test_get_covering_tests(self):
+        node = utils.create_ast(utils.f("""
+        def foo(x):
+            if x:
+                return 1
+            return 2
+        """))
+        module = self.coverage_tracer.inject(node)
+
+        class FooTest(unittest.TestCase):
+
+            def test_x(self):
+                module.foo(True)
+
+            def test_y(self):
+                module.foo(False)
+
+        result = coverage.CoverageTestResult(coverage_injector=self.coverage_tracer)
+        test_x, test_y = FooTest('test_x'), FooTest('test_y')
+        unittest.TestSuite([test_x, test_y]).run(result)
+
+        if_node = node.body[0].body[0]
+        return_node = node.body[0].body[1]
+        self.assertEqual(result.get_covering_tests({if_node.test.marker}), [test_x.id(), test_y.id()])
+        self.assertEqual(result.get_covering_tests({if_node.body[0].marker}), [test_x.id()])
+        self.assertEqual(result.get_covering_tests({return_node.marker}), [test_y.id()])
+
+
 class CoverageTestResultTest(unittest.TestCase):
 
     def test_run(self):
@@ -226,3 +357,26 @@ class CoverageTestResultTest(unittest.TestCase):
         self.assertEqual(coverage_injector.covered_nodes, {1})
         self.assertEqual(result.test_covered_nodes[repr(test_x)], {1})
         self.assertFalse(result.test_covered_nodes[repr(test_y)])
+
+    def test_get_covering_tests(self):
+        coverage_injector = coverage.CoverageInjector()
+
+        class ATest(unittest.TestCase):
+
+            def test_x(self):
+                coverage_injector.covered_nodes.update({1, 2})
+
+            def test_y(self):
+                coverage_injector.covered_nodes.add(2)
+
+            def test_z(self):
+                coverage_injector.covered_nodes.add(3)
+
+        result = coverage.CoverageTestResult(coverage_injector=coverage_injector)
+        test_x, test_y, test_z = ATest('test_x'), ATest('test_y'), ATest('test_z')
+        unittest.TestSuite([test_z, test_y, test_x]).run(result)
+
+        self.assertEqual(result.get_covering_tests({1}), [test_x.id()])
+        self.assertEqual(result.get_covering_tests({2}), [test_y.id(), test_x.id()])
+        self.assertEqual(result.get_covering_tests({1, 3}), [test_z.id(), test_x.id()])
+        self.assertEqual(result.get_covering_tests({4}), [])
@@ -0,0 +1,100 @@
+import sys
+import threading
+import unittest
+from multiprocessing.connection import Client
+from mutpy import distributed
+
+
+class MockWorkerPool:
+
+    def __init__(self):
+        self.tasks = []
+
+    def imap(self, tasks):
+        for task, live_time in tasks:
+            self.tasks.append(task)
+            yield task.upper(), live_time
+
+    def close(self):
+        pass
+
+
+class ParseAddressTest(unittest.TestCase):
+
+    def test_host_and_port(self):
+        self.assertEqual(distributed.parse_address('example.com:1234'), ('example.com', 1234))
+
+    def test_only_port(self):
+        self.assertEqual(distributed.parse_address(':1234'), ('localhost', 1234))
+
+
+class AuthkeyTest(unittest.TestCase):
+
+    def test_loopback(self):
+        self.assertTrue(distributed.is_loopback(('localhost', 1234)))
+        self.assertTrue(distributed.is_loopback(('127.0.0.1', 1234)))
+        self.assertTrue(distributed.is_loopback(('::1', 1234)))
+        self.assertFalse(distributed.is_loopback(('0.0.0.0', 1234)))
+        self.assertFalse(distributed.is_loopback(('example.com', 1234)))
+
+    def test_default_authkey_for_loopback(self):
+        self.assertEqual(distributed.get_authkey(('localhost', 1234)), distributed.DEFAULT_AUTHKEY)
+
+    def test_given_authkey(self):
+        self.assertEqual(distributed.get_authkey(('example.com', 1234), 'secret'), 'secret')
+
+    def test_require_authkey_for_non_loopback(self):
+        with self.assertRaises(ValueError):
+            distributed.get_authkey(('0.0.0.0', 1234))
+
+    def test_generate_authkey(self):
+        self.assertNotEqual(distributed.generate_authkey(), distributed.generate_authkey())
+
+
+class CoordinatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.coordinator = distributed.Coordinator(('localhost', 0), batch_size=2)
+
+    def tearDown(self):
+        self.coordinator.close()
+
+    def start_worker(self, worker_pool):
+        worker = distributed.Worker(self.coordinator.address, worker_pool)
+        thread = threading.Thread(target=worker.run)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def test_imap(self):
+        worker_pool = MockWorkerPool()
+        self.start_worker(worker_pool)
+
+        results = list(self.coordinator.imap([('a', 1), (None, 1), ('b', 2), ('c', 3)]))
+
+        self.assertEqual(results, [('A', 1), (None, 0), ('B', 2), ('C', 3)])
+        self.assertEqual(worker_pool.tasks, ['a', 'b', 'c'])
+
+    def test_requeue_tasks_of_dead_worker(self):
+        connection = Client(self.coordinator.address, authkey=distributed.DEFAULT_AUTHKEY.encode())
+        connection.send(tuple(sys.version_info[:2]))
+        results = self.coordinator.imap([('a', 1), ('b', 1), ('c', 1)])
+        first_batch = []
+
+        def run_dead_worker():
+            first_batch.extend(connection.recv())
+            connection.close()
+            self.start_worker(MockWorkerPool())
+
+        threading.Thread(target=run_dead_worker).start()
+
+        self.assertEqual([result for result, _ in results], ['A', 'B', 'C'])
+        self.assertEqual([task for _, task, _ in first_batch], ['a', 'b'])
+
+    def test_reject_worker_with_other_python_version(self):
+        connection = Client(self.coordinator.address, authkey=distributed.DEFAULT_AUTHKEY.encode())
+
+        connection.send((2, 7))
+
+        self.assertIsNone(connection.recv())
+        connection.close()
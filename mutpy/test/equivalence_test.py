@@ -0,0 +1,61 @@
+import unittest
+from mutpy import equivalence, operators, utils
+
+
+class TrivialCompilerEquivalenceTest(unittest.TestCase):
+
+    def get_keys(self, source, operator=operators.ArithmeticOperatorReplacement):
+        target_ast = utils.create_ast(source)
+        tce = equivalence.TrivialCompilerEquivalence(target_ast, 'target')
+        return [tce.get_keys(mutant, [mutation]) for mutation, mutant in operator().mutate(target_ast)]
+
+    def test_equivalent_folded_constant(self):
+        keys = self.get_keys('def two(): return 2 * 2')
+
+        self.assertEqual([original == mutant for original, mutant in keys], [False, False, True])
+
+    def test_duplicated_mutants(self):
+        keys = self.get_keys('def mul(x): return x * (1 * 2 * 2)')
+        mutants_keys = [mutant for _, mutant in keys]
+
+        self.assertEqual(len(mutants_keys), 9)
+        self.assertEqual(len(set(mutants_keys)), 8)
+
+    def test_same_code_in_different_functions(self):
+        keys = self.get_keys(utils.f("""
+        def add(x, y):
+            return x + y
+
+        def sub(x, y):
+            return x + y
+        """))
+
+        self.assertNotEqual(keys[0][1], keys[1][1])
+
+    def test_module_level_mutation(self):
+        keys = self.get_keys('x = 2 * 2')
+
+        self.assertEqual([original == mutant for original, mutant in keys], [False, False, True])
+        self.assertEqual(keys[0][0][0], ())
+
+    def test_method_mutation(self):
+        keys = self.get_keys(utils.f("""
+        class A:
+            def mul(self, x):
+                return x * 2
+        """))
+
+        self.assertEqual(keys[0][0][0], ((2, 4),))
+        self.assertNotIn(True, [original == mutant for original, mutant in keys])
+
+    def test_fingerprint_ignores_lines(self):
+        code = compile('x = 1', 'target', 'exec')
+        other_code = compile('\n\nx = 1', 'other', 'exec')
+
+        self.assertEqual(equivalence.get_code_fingerprint(code), equivalence.get_code_fingerprint(other_code))
+
+    def test_fingerprint_distinguishes_constant_types(self):
+        code = compile('x = 1', 'target', 'exec')
+        other_code = compile('x = 1.0', 'target', 'exec')
+
+        self.assertNotEqual(equivalence.get_code_fingerprint(code), equivalence.get_code_fingerprint(other_code))
@@ -1,5 +1,6 @@
 import unittest
 import ast
+import pickle
 from mutpy import operators, codegen, coverage, utils
 
 
@@ -19,27 +20,149 @@ class MutationOperatorTest(unittest.TestCase):
         self.operator = self.PassIdOperator()
         self.target_ast = utils.create_ast(PASS)
 
-    def test_generate_all_mutations_if_always_sampler(self):
+    def test_generate_all_mutations(self):
+        mutations = list(self.operator.mutate(self.target_ast))
 
-        class AlwaysSampler:
+        self.assertEqual(len(mutations), 1)
 
-            def is_mutation_time(self):
-                return True
+    def test_mutate_only_changed_lines(self):
+        target_ast = utils.create_ast(PASS + EOL + PASS + EOL + PASS)
 
-        mutations = list(self.operator.mutate(self.target_ast, sampler=AlwaysSampler()))
+        mutations = list(self.operator.mutate(target_ast, to_mutate=utils.ChangedLines([(2, 2)])))
 
-        self.assertEqual(len(mutations), 1)
+        self.assertEqual([mutation.node.lineno for mutation, _ in mutations], [2])
+
+    def test_skip_subtrees_without_visited_node_types(self):
+        target_ast = utils.create_ast(PASS + EOL + 'x = 1' + EOL + PASS)
+        visited_nodes = []
+        operator = self.PassIdOperator()
+        operator.find_visitors = lambda node: visited_nodes.append(node) or []
+
+        list(operator.mutate(target_ast, node_types=utils.NodeTypesIndex(target_ast)))
+
+        self.assertEqual([node.__class__.__name__ for node in visited_nodes], ['Module', 'Pass', 'Pass'])
+
+    def test_visitors_table(self):
+        table = operators.ArithmeticOperatorReplacement.get_visitors_table()
+
+        self.assertEqual(table['Div'], ['mutate_Div_to_FloorDiv', 'mutate_Div_to_Mult'])
+        self.assertEqual(table['Pow'], ['mutate_Pow'])
+        self.assertNotIn('Str', table)
+        self.assertNotIn('Div', self.PassIdOperator.get_visitors_table())
+
+
+class MutationDescriptorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.target_ast = utils.create_ast('x = 1 + 2' + EOL + 'y = x - 3')
+        self.mutations = [mutation for mutation, _ in
+                          operators.ArithmeticOperatorReplacement().mutate(self.target_ast)]
+
+    def test_stable_id(self):
+        descriptor = operators.MutationDescriptor.create('target', self.mutations[1])
+        other_ast = utils.create_ast('x = 1 + 2' + EOL + 'y = x - 3')
+        other_mutation = list(operators.ArithmeticOperatorReplacement().mutate(other_ast))[1][0]
+
+        self.assertEqual(descriptor.node_type, 'Sub')
+        self.assertEqual(descriptor.lineno, 2)
+        self.assertEqual(descriptor.id, operators.get_mutations_id('target', [other_mutation]))
+        self.assertNotEqual(descriptor.id, operators.get_mutations_id('other', [other_mutation]))
+
+    def test_lineno_of_node_without_position(self):
+        mutation = self.mutations[1]
+        mutation.node.lineno = 5
+
+        descriptor = operators.MutationDescriptor.create('target', mutation)
+
+        self.assertEqual((descriptor.lineno, descriptor.col_offset), (2, 4))
+
+    def test_different_ids(self):
+        ids = {operators.get_mutations_id('target', [mutation]) for mutation in self.mutations}
+
+        self.assertEqual(len(ids), len(self.mutations))
 
-    def test_no_mutations_if_never_sampler(self):
+    def test_pickle(self):
+        descriptor = operators.MutationDescriptor.create('target', self.mutations[0])
 
-        class NeverSampler:
+        loaded = pickle.loads(pickle.dumps(descriptor))
 
-            def is_mutation_time(self):
-                return False
+        self.assertEqual(loaded, descriptor)
+        self.assertEqual(loaded.id, descriptor.id)
 
-        mutations = list(self.operator.mutate(self.target_ast, sampler=NeverSampler()))
+    def test_rebuild_mutant(self):
+        original_dump = ast.dump(self.target_ast)
+        descriptor = operators.MutationDescriptor.create('target', self.mutations[1])
 
-        self.assertEqual(len(mutations), 0)
+        for mutations, mutant in operators.rebuild_mutant(self.target_ast, [descriptor]):
+            self.assertEqual(codegen.to_source(mutant), 'x = 1 + 2' + EOL + 'y = x + 3')
+            self.assertEqual(mutations[0].operator, operators.ArithmeticOperatorReplacement)
+
+        self.assertEqual(ast.dump(self.target_ast), original_dump)
+
+    def test_rebuild_mutant_from_other_tree(self):
+        descriptor = operators.MutationDescriptor.create('target', self.mutations[0])
+        other_ast = utils.create_ast('x = 1 - 2')
+
+        with self.assertRaises(ValueError):
+            list(operators.rebuild_mutant(other_ast, [descriptor]))
+
+
+class ApplyMutationsTest(unittest.TestCase):
+
+    def test_apply_and_revert(self):
+        target_ast = utils.create_ast('if x:' + EOL + INDENT + 'y = 1 + 2' + EOL + 'z = [x - y]')
+        original_dump = ast.dump(target_ast)
+        operators_classes = [operators.ArithmeticOperatorReplacement, operators.ConditionalOperatorInsertion]
+        mutations = [mutation for op in operators_classes for mutation, _ in op().mutate(target_ast)]
+
+        for applied_mutations, mutant in operators.apply_mutations(target_ast, [mutations[1], mutations[2]]):
+            self.assertEqual(codegen.to_source(mutant),
+                             'if (not x):' + EOL + INDENT + 'y = 1 + 2' + EOL + 'z = [x + y]')
+            self.assertEqual([mutation.node for mutation in applied_mutations], [mutations[1].node, mutations[2].node])
+
+        self.assertEqual(ast.dump(target_ast), original_dump)
+
+    def test_copy_node_visitor_name(self):
+        target_ast = utils.create_ast('if x:' + EOL + INDENT + PASS)
+
+        mutation, _ = next(operators.ConditionalOperatorInsertion().mutate(target_ast))
+
+        self.assertEqual(mutation.visitor, 'mutate_If')
+
+
+class FindMutationsTest(unittest.TestCase):
+
+    def test_same_mutations_as_each_operator_separately(self):
+        target_ast = utils.create_ast(utils.f("""
+        def f(x, y):
+            if x < y and (y > 2 or x[1:2]):
+                return x + y
+            return x[::2]
+        """))
+        operators_classes = [
+            operators.ArithmeticOperatorReplacement,
+            operators.ConditionalOperatorInsertion,
+            operators.SliceIndexRemove,
+            operators.SufficientLogicalConnectorReplacement,
+            operators.SufficientRelationalOperatorReplacement,
+        ]
+        expected_mutations = []
+        expected_pruned_mutants = 0
+        for operator_class in operators_classes:
+            operator = operator_class()
+            expected_mutations += [(mutation.operator, mutation.node, mutation.visitor)
+                                   for mutation, _ in operator.mutate(target_ast)]
+            expected_pruned_mutants += getattr(operator, 'pruned_mutants', 0)
+        operators_list = [operator_class() for operator_class in operators_classes]
+        for operator in operators_list:
+            operator.set_context()
+
+        mutations = operators.find_mutations(target_ast, operators_list)
+
+        self.assertEqual([(mutation.operator, mutation.node, mutation.visitor) for mutation in mutations],
+                         expected_mutations)
+        self.assertEqual(sum(getattr(operator, 'pruned_mutants', 0) for operator in operators_list),
+                         expected_pruned_mutants)
 
 
 class OperatorTestCase(unittest.TestCase):
@@ -59,6 +182,7 @@ class OperatorTestCase(unittest.TestCase):
         module = None
         if with_exec:
             module = utils.create_module(original_ast)
+        original_dump = ast.dump(original_ast)
         for mutation, mutatnt in operator.mutate(original_ast, coverage_injector=coverage_injector, module=module):
             mutant_code = codegen.remove_extra_lines(codegen.to_source(mutatnt))
             msg = '\n\nMutant:\n\n' + mutant_code + '\n\nNot found in:'
@@ -71,6 +195,7 @@ class OperatorTestCase(unittest.TestCase):
                 self.assert_mutation_lineo(mutation.node.lineno, lines)
 
         self.assertListEqual(mutants, [], 'did not generate all mutants')
+        self.assertEqual(ast.dump(original_ast), original_dump, 'original tree was modified')
 
     def assert_no_mutation(self, original, **kwargs):
         self.assert_mutation(original, mutants=[], **kwargs)
@@ -285,6 +410,75 @@ class RelationalOperatorReplacementTest(OperatorTestCase):
         self.assert_mutation('x != y', ['x == y'])
 
 
+class SufficientLogicalConnectorReplacementTest(OperatorTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.op = operators.SufficientLogicalConnectorReplacement()
+
+    def test_and(self):
+        self.assert_mutation('(x and y)', ['x', 'y', 'False'])
+
+    def test_or(self):
+        self.assert_mutation('(x or y)', ['x', 'y', 'True'])
+
+    def test_many_operands(self):
+        self.assert_mutation('(x and y and z)', ['(x and y)', '(y and z)', 'False'])
+
+    def test_pruned_mutants(self):
+        operator = operators.SufficientLogicalConnectorReplacement()
+
+        list(operator.mutate(utils.create_ast('(x and y)' + EOL + '(x or y)')))
+
+        self.assertEqual(operator.pruned_mutants, 2 - 6)
+        self.assertEqual(operator.name(), 'LCR')
+
+
+class SufficientRelationalOperatorReplacementTest(OperatorTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.op = operators.SufficientRelationalOperatorReplacement()
+
+    def test_lt(self):
+        self.assert_mutation('x < y', ['x <= y', 'x != y', 'False'])
+
+    def test_gt(self):
+        self.assert_mutation('x > y', ['x >= y', 'x != y', 'False'])
+
+    def test_lte(self):
+        self.assert_mutation('x <= y', ['x < y', 'x == y', 'True'])
+
+    def test_gte(self):
+        self.assert_mutation('x >= y', ['x > y', 'x == y', 'True'])
+
+    def test_eq(self):
+        self.assert_mutation('x == y', ['x != y'])
+
+    def test_not_eq(self):
+        self.assert_mutation('x != y', ['x == y'])
+
+    def test_chained_comparison(self):
+        self.assert_mutation('x < y < z', ['x <= y < z', 'x != y < z', 'x < y <= z', 'x < y != z'])
+
+    def test_pruned_mutants(self):
+        operator = operators.SufficientRelationalOperatorReplacement()
+
+        list(operator.mutate(utils.create_ast('x < y' + EOL + 'x == y')))
+
+        self.assertEqual(operator.pruned_mutants, 1 - 2)
+        self.assertEqual(operator.name(), 'ROR')
+        self.assertEqual(operator.long_name(), 'relational operator replacement')
+
+    def test_rebuild_mutant_by_descriptor(self):
+        target_ast = utils.create_ast('x < y')
+        mutation = list(self.op.mutate(target_ast))[2][0]
+        descriptor = operators.MutationDescriptor.create('target', mutation)
+
+        for _, mutant in operators.rebuild_mutant(target_ast, [descriptor]):
+            self.assertEqual(codegen.to_source(mutant), 'x != y')
+
+
 class SliceIndexRemoveTest(OperatorTestCase):
 
     @classmethod
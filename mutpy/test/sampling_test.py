@@ -0,0 +1,84 @@
+import collections
+import unittest
+from mutpy import controller, operators, sampling, utils
+
+
+class AllocateTest(unittest.TestCase):
+
+    def test_allocate_proportionally(self):
+        allocation = sampling.allocate({'a': 60, 'b': 30, 'c': 10}, 10)
+
+        self.assertEqual(allocation, {'a': 6, 'b': 3, 'c': 1})
+
+    def test_allocate_remainders(self):
+        allocation = sampling.allocate({'a': 1, 'b': 1, 'c': 1}, 2)
+
+        self.assertEqual(sum(allocation.values()), 2)
+        self.assertEqual(sorted(allocation.values()), [0, 1, 1])
+
+    def test_allocate_if_empty(self):
+        self.assertEqual(sampling.allocate({}, 10), {})
+
+
+class MutantSamplerTest(unittest.TestCase):
+
+    def get_mutants(self, source, operators_list=(operators.ArithmeticOperatorReplacement,)):
+        mutator = controller.FirstOrderMutator(operators_list)
+        return mutator.generate_mutants(utils.create_ast(source), None, None, None)
+
+    def test_is_active(self):
+        self.assertFalse(sampling.MutantSampler().is_active)
+        self.assertTrue(sampling.MutantSampler(percentage=50).is_active)
+        self.assertTrue(sampling.MutantSampler(max_mutants=10).is_active)
+
+    def test_get_target(self):
+        self.assertEqual(sampling.MutantSampler(percentage=10).get_target(55), 6)
+        self.assertEqual(sampling.MutantSampler(percentage=10).get_target(2), 1)
+        self.assertEqual(sampling.MutantSampler(max_mutants=5).get_target(55), 5)
+        self.assertEqual(sampling.MutantSampler(percentage=10).get_target(0), 0)
+
+    def test_select_reproducible(self):
+        mutants = self.get_mutants('x = a + b - c * d / e')
+
+        first = sampling.MutantSampler(percentage=50, seed=7).select('target', mutants)
+        second = sampling.MutantSampler(percentage=50, seed=7).select('target', mutants)
+
+        self.assertEqual(len(first), 4)
+        self.assertEqual(first, second)
+
+    def test_select_keeps_order(self):
+        mutants = self.get_mutants('x = a + b - c * d / e')
+
+        selected = sampling.MutantSampler(percentage=50).select('target', mutants)
+
+        self.assertEqual(selected, sorted(selected, key=mutants.index))
+
+    def test_select_from_each_stratum(self):
+        mutants = self.get_mutants(utils.f("""
+        def add(x, y):
+            x += y
+            return x + y - 1
+
+        def sub(x, y):
+            x -= y
+            return x - y + 1
+        """), operators_list=[operators.ArithmeticOperatorReplacement, operators.AssignmentOperatorReplacement])
+
+        selected = sampling.MutantSampler(percentage=50).select('target', mutants)
+
+        strata = collections.Counter(sampling.get_stratum('target', mutations[0]) for mutations in selected)
+        self.assertEqual(len(selected), 3)
+        self.assertEqual(strata[('target', 'AOR', ('add', 1))], 1)
+        self.assertEqual(strata[('target', 'AOR', ('sub', 5))], 1)
+
+    def test_select_with_global_budget(self):
+        sampler = sampling.MutantSampler(max_mutants=3)
+        first_mutants = self.get_mutants('x = a + b - c')
+        second_mutants = self.get_mutants('x = a * b / c * d / e')
+        sampler.add_population('first', first_mutants)
+        sampler.add_population('second', second_mutants)
+
+        sampler.allocate()
+
+        selected = sampler.select('first', first_mutants) + sampler.select('second', second_mutants)
+        self.assertEqual(len(selected), 3)
@@ -0,0 +1,122 @@
+import ast
+import marshal
+import unittest
+from mutpy import controller, operators, schemata, utils
+
+
+class PassToBreak(operators.MutationOperator):
+
+    def mutate_Pass(self, node):
+        return ast.Break()
+
+
+class MutantSchemaTest(unittest.TestCase):
+
+    def mutate(self, source, operator):
+        target_ast = utils.create_ast(utils.f(source))
+        schema = schemata.MutantSchema(target_ast, 'target')
+        mutants = []
+        for _, mutant_ast in schema.mutate(controller.FirstOrderMutator([operator]).mutate(target_ast)):
+            try:
+                mutants.append((schema.mutant_id, utils.create_module(mutant_ast)))
+            except SyntaxError:
+                mutants.append((schema.mutant_id, None))
+        if not schema.code:
+            return None, mutants
+        module = utils.create_module_from_code(marshal.loads(schema.code), 'target',
+                                               {schemata.ACTIVE_MUTANT_NAME: 0})
+        return module, mutants
+
+    def test_switch_mutants_in_functions(self):
+        module, mutants = self.mutate("""
+        def add(x, y):
+            return x + y
+
+        def sub(x, y):
+            return x - y
+        """, operators.ArithmeticOperatorReplacement)
+
+        self.assertEqual([mutant_id for mutant_id, _ in mutants], [1, 2])
+        for mutant_id, mutant_module in mutants:
+            setattr(module, schemata.ACTIVE_MUTANT_NAME, mutant_id)
+            self.assertEqual(module.add(5, 3), mutant_module.add(5, 3))
+            self.assertEqual(module.sub(5, 3), mutant_module.sub(5, 3))
+        setattr(module, schemata.ACTIVE_MUTANT_NAME, 0)
+        self.assertEqual(module.add(5, 3), 8)
+        self.assertEqual(module.sub(5, 3), 2)
+
+    def test_switch_replaced_statements(self):
+        module, mutants = self.mutate("""
+        def is_odd(x):
+            if x % 2:
+                return True
+            return False
+        """, operators.ConditionalOperatorInsertion)
+
+        self.assertEqual([mutant_id for mutant_id, _ in mutants], [1])
+        setattr(module, schemata.ACTIVE_MUTANT_NAME, 1)
+        self.assertTrue(module.is_odd(2))
+
+    def test_copy_only_mutated_statements(self):
+        target_ast = utils.create_ast(utils.f("""
+        def f(x):
+            y = x + 1
+            z = x - 1
+            return y * z
+        """))
+        schema = schemata.MutantSchema(target_ast, 'target')
+        function = target_ast.body[0]
+        statements = function.body[:]
+        mutation = operators.Mutation(operator=operators.ArithmeticOperatorReplacement, node=statements[1].value.op,
+                                      visitor='mutate_Sub')
+
+        mutant = schema.snapshot(1, [mutation], set(target_ast.body))
+
+        body = mutant.bodies[function]
+        self.assertIs(body[0], statements[0])
+        self.assertIsNot(body[1], statements[1])
+        self.assertIs(body[2], statements[2])
+
+    def test_keep_docstring(self):
+        module, mutants = self.mutate("""
+        def add(x, y):
+            '''doc'''
+            return x + y
+        """, operators.ArithmeticOperatorReplacement)
+
+        self.assertEqual(module.add.__doc__, 'doc')
+        setattr(module, schemata.ACTIVE_MUTANT_NAME, mutants[0][0])
+        self.assertEqual(module.add(5, 3), 2)
+
+    def test_skip_module_level_mutants(self):
+        module, mutants = self.mutate("""
+        x = 1 + 2
+
+        def add(y):
+            return x + y
+        """, operators.ArithmeticOperatorReplacement)
+
+        self.assertEqual([mutant_id for mutant_id, _ in mutants], [None, 2])
+        self.assertEqual(mutants[0][1].x, -1)
+        self.assertEqual(module.x, 3)
+
+    def test_skip_mutants_with_new_local_names(self):
+        _, mutants = self.mutate("""
+        def swap(x, y):
+            (x, y) = (y, x)
+            return x
+        """, operators.HidingVariableDeletion)
+
+        self.assertTrue(all(mutant_id is None for mutant_id, _ in mutants))
+
+    def test_skip_mutants_which_can_not_be_compiled(self):
+        module, mutants = self.mutate("""
+        def empty():
+            pass
+
+        def add(x, y):
+            return x + y
+        """, PassToBreak)
+
+        self.assertEqual([mutant_id for mutant_id, _ in mutants], [None])
+        self.assertIsNone(module)
@@ -0,0 +1,118 @@
+import unittest
+from mutpy import controller, sharding
+
+
+class ParseShardTest(unittest.TestCase):
+
+    def test_parse(self):
+        shard = sharding.parse_shard('2/4')
+
+        self.assertEqual((shard.index, shard.count), (2, 4))
+        self.assertEqual(str(shard), '2/4')
+
+    def test_parse_with_tests_durations(self):
+        shard = sharding.parse_shard('1/2', {'test.A.test_a': 0.008, 'test.A.test_b': 0})
+
+        self.assertEqual(shard.tests_weights, {'test.A.test_a': 8, 'test.A.test_b': 1})
+
+    def test_parse_wrong_index(self):
+        for value in ['0/4', '5/4', '1', 'a/b']:
+            with self.assertRaises(ValueError):
+                sharding.parse_shard(value)
+
+
+class PartitionTest(unittest.TestCase):
+
+    def test_get_test_weight(self):
+        self.assertEqual(sharding.get_test_weight(0), 1)
+        self.assertEqual(sharding.get_test_weight(0.0009), 1)
+        self.assertEqual(sharding.get_test_weight(0.008), 8)
+        self.assertEqual(sharding.get_test_weight(0.0075), 8)
+
+    def test_get_mutant_cost(self):
+        self.assertEqual(sharding.get_mutant_cost(['a', 'b'], {'a': 4, 'b': 2, 'c': 8}), 7)
+
+    def test_partition_by_cost(self):
+        shards = sharding.partition({'a': 10, 'b': 4, 'c': 3, 'd': 3, 'e': 1}, 2)
+
+        self.assertEqual(shards, [{'a', 'e'}, {'b', 'c', 'd'}])
+
+    def test_partition_covers_all_mutants_once(self):
+        mutants_costs = {str(number): number % 7 + 1 for number in range(100)}
+
+        shards = sharding.partition(mutants_costs, 3)
+
+        self.assertEqual(set.union(*shards), set(mutants_costs))
+        self.assertEqual(sum(len(shard) for shard in shards), 100)
+        loads = [sum(mutants_costs[mutant_id] for mutant_id in shard) for shard in shards]
+        self.assertLessEqual(max(loads) - min(loads), 7)
+
+    def test_partition_independent_of_order(self):
+        mutants_costs = {'a': 1, 'b': 2, 'c': 1, 'd': 2}
+
+        self.assertEqual(sharding.partition(mutants_costs, 2),
+                         sharding.partition(dict(reversed(list(mutants_costs.items()))), 2))
+
+
+class MergeReportsTest(unittest.TestCase):
+
+    def create_report(self, index, mutations, covered_nodes=3):
+        return {
+            'targets': ['target'],
+            'tests': [{'name': 'test', 'target': None, 'time': 0.1}],
+            'number_of_tests': 2,
+            'mutations': [{'id': mutation_id, 'number': number, 'status': status, 'tests_run': 1}
+                          for number, (mutation_id, status) in enumerate(mutations, start=1)],
+            'total_time': 1.0,
+            'time_stats': {'run_tests_with_mutant': 0.5},
+            'population_mutants': len(mutations),
+            'coverage': {'covered_nodes': covered_nodes, 'all_nodes': 4, 'modules': {'target': [covered_nodes, 4]}},
+            'shard': {'index': index, 'count': 2, 'all_mutants': 4},
+        }
+
+    def test_merge(self):
+        score = controller.MutationScore()
+
+        report = sharding.merge_reports([
+            self.create_report(1, [('a', 'killed'), ('b', 'survived')]),
+            self.create_report(2, [('c', 'killed'), ('d', 'timeout')]),
+        ], score)
+
+        self.assertEqual(score.all_mutants, 4)
+        self.assertEqual(score.count(), 75)
+        self.assertEqual(report['mutation_score'], 75)
+        self.assertEqual([mutation['number'] for mutation in report['mutations']], [1, 2, 3, 4])
+        self.assertEqual(report['total_time'], 2.0)
+        self.assertEqual(report['time_stats'], {'run_tests_with_mutant': 1.0})
+        self.assertEqual(report['population_mutants'], 4)
+        self.assertEqual((score.covered_nodes, score.all_nodes), (3, 4))
+        self.assertEqual(len(report['tests']), 1)
+
+    def test_merge_coverage_of_different_modules(self):
+        first = self.create_report(1, [('a', 'killed'), ('b', 'survived')])
+        second = self.create_report(2, [('c', 'killed'), ('d', 'timeout')], covered_nodes=1)
+        second['coverage']['modules'] = {'other': [1, 4]}
+        score = controller.MutationScore()
+
+        report = sharding.merge_reports([first, second], score)
+
+        self.assertEqual((score.covered_nodes, score.all_nodes), (4, 8))
+        self.assertEqual(report['coverage']['modules'], {'target': [3, 4], 'other': [1, 4]})
+
+    def test_merge_if_missing_shard(self):
+        with self.assertRaises(ValueError):
+            sharding.merge_reports([self.create_report(1, [('a', 'killed')])], controller.MutationScore())
+
+    def test_merge_if_missing_mutants(self):
+        with self.assertRaises(ValueError):
+            sharding.merge_reports([
+                self.create_report(1, [('a', 'killed')]),
+                self.create_report(2, [('c', 'killed')]),
+            ], controller.MutationScore())
+
+    def test_merge_if_same_mutants(self):
+        with self.assertRaises(ValueError):
+            sharding.merge_reports([
+                self.create_report(1, [('a', 'killed'), ('b', 'survived')]),
+                self.create_report(2, [('b', 'killed'), ('d', 'timeout')]),
+            ], controller.MutationScore())
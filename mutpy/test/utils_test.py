@@ -1,8 +1,11 @@
+import ast
 import unittest
 import os
 import shutil
+import signal
 import types
 import tempfile
+import time
 import sys
 from mutpy import utils, operators
 
@@ -73,6 +76,16 @@ class ModulesLoaderTest(unittest.TestCase):
         self.assert_module(target[0], 'a.b.c.sample', 'a/b/c/sample.py', [])
         self.assert_module(test[0], 'a.b.c.sample_test', 'a/b/c/sample_test.py', [])
 
+    def test_load_only_changed_modules(self):
+        changed_lines = utils.ChangedLines([(2, 2)])
+        changes = {os.path.abspath(ModulesLoaderTest.tmp + 'a/b/c/sample.py'): changed_lines}
+        loader = utils.ModulesLoader(['a'], ModulesLoaderTest.tmp, changes)
+
+        [(module, to_mutate)] = loader.load()
+
+        self.assert_module(module, 'a.b.c.sample', 'a/b/c/sample.py', ['X'])
+        self.assertIs(to_mutate, changed_lines)
+
 
 class MockTimer():
 
@@ -206,6 +219,450 @@ class ParentNodeTransformerTest(unittest.TestCase):
         utils.ParentNodeTransformer().visit(node)
 
         self.assertEqual(node.body[0].op.parent, node.body[0])
-        self.assertIn(node.body[0].op, node.body[0].children)
         self.assertEqual(node.body[0].value.op.parent, node.body[0].value)
-        self.assertIn(node.body[0].value.op, node.body[0].value.children)
+
+    def test_set_interval(self):
+        node = utils.create_ast('x += y + z')
+
+        self.assertEqual(node.interval, (0, len(list(ast.walk(node)))))
+        self.assertTrue(utils.is_ancestor(node.body[0], node.body[0].value.op))
+        self.assertTrue(utils.is_ancestor(node.body[0].value, node.body[0].value.op))
+        self.assertFalse(utils.is_ancestor(node.body[0].value, node.body[0].op))
+        self.assertFalse(utils.is_ancestor(node.body[0].value.op, node.body[0].value))
+        self.assertFalse(utils.is_ancestor(node.body[0], node.body[0]))
+
+    def test_do_not_share_attributes_of_singleton_nodes(self):
+        first_node = utils.create_ast('x = 1 + 2')
+        first_node.body[0].value.op.lineno = 1
+        first_node.body[0].value.op.marker = 3
+
+        second_node = utils.create_ast('y = 1 + 2')
+
+        op = second_node.body[0].value.op
+        self.assertIsNot(op, first_node.body[0].value.op)
+        self.assertEqual(op.parent, second_node.body[0].value)
+        self.assertFalse(hasattr(op, 'lineno'))
+        self.assertFalse(hasattr(op, 'marker'))
+
+
+class MutationTestWorkerPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = utils.MutationTestWorkerPool(handler=self.handler)
+
+    def tearDown(self):
+        self.pool.close()
+
+    @staticmethod
+    def handler(task):
+        if task == 'loop':
+            while True:
+                pass
+        return task, os.getpid()
+
+    def test_run(self):
+        result, _ = self.pool.run('task', live_time=5)
+
+        self.assertEqual(result, 'task')
+
+    def test_reuse_worker(self):
+        _, first_pid = self.pool.run('first', live_time=5)
+        _, second_pid = self.pool.run('second', live_time=5)
+
+        self.assertEqual(first_pid, second_pid)
+        self.assertNotEqual(first_pid, os.getpid())
+
+    def test_recycle_worker_after_timeout(self):
+        _, first_pid = self.pool.run('first', live_time=5)
+
+        result = self.pool.run('loop', live_time=0.1)
+        _, second_pid = self.pool.run('second', live_time=5)
+
+        self.assertIsNone(result)
+        self.assertNotEqual(first_pid, second_pid)
+
+    def test_imap_keeps_order(self):
+        pool = utils.MutationTestWorkerPool(handler=self.sleeping_handler, size=3)
+        tasks = [(0.3, 5), (None, 5), (0.1, 5), (0.2, 5)]
+
+        try:
+            results = [result for result, _ in pool.imap(tasks)]
+        finally:
+            pool.close()
+
+        self.assertEqual(results, [0.3, None, 0.1, 0.2])
+
+    def test_imap_with_timeout(self):
+        pool = utils.MutationTestWorkerPool(handler=self.sleeping_handler, size=2)
+        tasks = [(5, 0.1), (0, 5)]
+
+        try:
+            results = [result for result, _ in pool.imap(tasks)]
+        finally:
+            pool.close()
+
+        self.assertEqual(results, [None, 0])
+
+    def test_recycle_worker_after_max_tasks(self):
+        pool = utils.MutationTestWorkerPool(handler=self.handler, max_tasks=1)
+
+        try:
+            _, first_pid = pool.run('first', live_time=5)
+            _, second_pid = pool.run('second', live_time=5)
+        finally:
+            pool.close()
+
+        self.assertNotEqual(first_pid, second_pid)
+
+    @staticmethod
+    def sleeping_handler(task):
+        time.sleep(task)
+        return task
+
+
+class ForkServerWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = utils.MutationTestWorkerPool(handler=self.handler, worker_class=utils.ForkServerWorker)
+
+    def tearDown(self):
+        self.pool.close()
+
+    @staticmethod
+    def handler(task):
+        if task == 'loop':
+            while True:
+                pass
+        return task, os.getpid(), os.getppid()
+
+    def test_fork_child_for_each_task(self):
+        _, first_pid, first_server_pid = self.pool.run('first', live_time=5)
+        _, second_pid, second_server_pid = self.pool.run('second', live_time=5)
+
+        self.assertNotEqual(first_pid, second_pid)
+        self.assertEqual(first_server_pid, second_server_pid)
+
+    def test_keep_server_after_timeout(self):
+        _, _, first_server_pid = self.pool.run('first', live_time=5)
+
+        result = self.pool.run('loop', live_time=0.1)
+        task, _, second_server_pid = self.pool.run('second', live_time=5)
+
+        self.assertIsNone(result)
+        self.assertEqual(task, 'second')
+        self.assertEqual(first_server_pid, second_server_pid)
+
+
+class MutationTestResultTest(unittest.TestCase):
+
+    class SleepTest(unittest.TestCase):
+
+        def test_sleep(self):
+            time.sleep(5)
+
+        def test_pass(self):
+            pass
+
+    def test_stop_test_after_its_live_time(self):
+        suite = unittest.TestSuite([self.SleepTest('test_sleep'), self.SleepTest('test_pass')])
+        sleep_test_id = self.SleepTest('test_sleep').id()
+        result = utils.MutationTestResult(test_live_times={sleep_test_id: 0.1})
+        timer = utils.Timer()
+
+        suite.run(result)
+
+        self.assertLess(timer.stop(), 5)
+        self.assertTrue(result.timeout)
+        self.assertEqual(result.testsRun, 1)
+        self.assertIsNone(result.serialize())
+
+    @unittest.skipUnless(hasattr(signal, 'setitimer'), 'interval timers are not supported')
+    def test_timeout_outside_of_test(self):
+
+        class SlowBookkeepingResult(utils.MutationTestResult):
+
+            def addSuccess(self, test):
+                time.sleep(5)
+
+        test = self.SleepTest('test_pass')
+        result = SlowBookkeepingResult(test_live_times={test.id(): 0.1})
+        timer = utils.Timer()
+
+        result.run_suite(unittest.TestSuite([test]))
+
+        self.assertLess(timer.stop(), 5)
+        self.assertTrue(result.timeout)
+
+    @unittest.skipUnless(hasattr(signal, 'setitimer'), 'interval timers are not supported')
+    def test_restore_previous_alarm(self):
+        test = self.SleepTest('test_pass')
+        result = utils.MutationTestResult(test_live_times={test.id(): 0.1})
+        handler = lambda signum, frame: None
+        previous_handler = signal.signal(signal.SIGALRM, handler)
+        signal.setitimer(signal.ITIMER_REAL, 10)
+        try:
+            result.run_suite(unittest.TestSuite([test]))
+
+            self.assertIs(signal.getsignal(signal.SIGALRM), handler)
+            self.assertGreater(signal.getitimer(signal.ITIMER_REAL)[0], 9)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+    def test_run_without_live_times(self):
+        result = utils.MutationTestResult()
+
+        self.SleepTest('test_pass').run(result)
+
+        self.assertFalse(result.timeout)
+        self.assertTrue(result.serialize().is_survived)
+
+
+class TimedTestResultTest(unittest.TestCase):
+
+    def test_record_durations(self):
+        test = MutationTestResultTest.SleepTest('test_pass')
+        result = utils.TimedTestResult()
+
+        test.run(result)
+
+        self.assertEqual(list(result.durations), [test.id()])
+
+
+class CopyTestTest(unittest.TestCase):
+
+    class ATest(unittest.TestCase):
+
+        def test_a(self):
+            pass
+
+    class CustomInitTest(unittest.TestCase):
+
+        def __init__(self, value):
+            super().__init__('test_a')
+            self.value = value
+
+        def test_a(self):
+            pass
+
+    def test_create_new_instance(self):
+        test = self.ATest('test_a')
+        test.state = 'dirty'
+
+        copied_test = utils.copy_test(test)
+
+        self.assertIsNot(copied_test, test)
+        self.assertEqual(copied_test.id(), test.id())
+        self.assertFalse(hasattr(copied_test, 'state'))
+
+    def test_copy_test_with_custom_init(self):
+        test = self.CustomInitTest(1)
+
+        copied_test = utils.copy_test(test)
+
+        self.assertIsNot(copied_test, test)
+        self.assertEqual(copied_test.value, 1)
+
+
+class ParseUnifiedDiffTest(unittest.TestCase):
+
+    def test_parse_git_diff(self):
+        changes = utils.parse_unified_diff(utils.f("""
+        diff --git a/x.py b/x.py
+        --- a/x.py
+        +++ b/x.py
+        @@ -1,2 +1,3 @@ def f():
+        -a = 1
+        -b = 2
+        +a = 2
+        +b = 3
+        +c = 4
+        @@ -10 +11 @@
+        -x = 1
+        +x = 2
+        @@ -20,2 +21,0 @@
+        -y = 1
+        -z = 1
+        diff --git a/y.py b/y.py
+        --- a/y.py
+        +++ /dev/null
+        @@ -1 +0,0 @@
+        -x = 1
+        """), root='/repo')
+
+        self.assertEqual(list(changes), ['/repo/x.py'])
+        self.assertEqual(changes['/repo/x.py'].ranges, [(1, 3), (11, 11), (21, 22)])
+
+    def test_parse_diff_without_prefixes(self):
+        changes = utils.parse_unified_diff(utils.f("""
+        --- x.py\t2020-01-01 00:00:00
+        +++ b/x.py\t2020-01-01 00:00:00
+        @@ -1 +1 @@
+        -x = 1
+        +x = 2
+        """), root='/repo')
+
+        self.assertEqual(list(changes), ['/repo/b/x.py'])
+
+    def test_parse_hunk_lines_similar_to_headers(self):
+        changes = utils.parse_unified_diff(utils.f("""
+        diff --git a/x.py b/x.py
+        --- a/x.py
+        +++ b/x.py
+        @@ -1,3 +1,3 @@
+         x = 1
+        --- y = 2
+        +++ y = 3
+         z = 4
+        @@ -10 +10,2 @@
+        -a = 1
+        +a = 2
+        +++ b/y.py
+        """), root='/repo')
+
+        self.assertEqual(list(changes), ['/repo/x.py'])
+        self.assertEqual(changes['/repo/x.py'].ranges, [(2, 2), (10, 11)])
+
+    def test_parse_hunks_with_context(self):
+        changes = utils.parse_unified_diff(utils.f("""
+        --- a/x.py
+        +++ b/x.py
+        @@ -17,7 +17,7 @@
+         a = 1
+         b = 2
+         c = 3
+        -d = 4
+        +d = 5
+         e = 6
+         f = 7
+         g = 8
+        @@ -30,7 +30,6 @@
+         h = 1
+         i = 2
+         j = 3
+        -k = 4
+         l = 5
+         m = 6
+         n = 7
+        """), root='/repo')
+
+        self.assertEqual(changes['/repo/x.py'].ranges, [(20, 20), (32, 33)])
+
+
+class ChangedLinesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.target_ast = utils.create_ast(utils.f("""
+        x = 1
+        def f():
+            y = 2
+            return y
+        """))
+
+    def test_merge_ranges(self):
+        self.assertEqual(utils.ChangedLines([(5, 6), (1, 2), (3, 3), (2, 4)]).ranges, [(1, 6)])
+
+    def test_intersects(self):
+        changed_lines = utils.ChangedLines([(3, 3)])
+        assign, function = self.target_ast.body
+
+        self.assertTrue(changed_lines.intersects(self.target_ast))
+        self.assertFalse(changed_lines.intersects(assign))
+        self.assertTrue(changed_lines.intersects(function))
+        self.assertTrue(changed_lines.intersects(function.body[0]))
+        self.assertFalse(changed_lines.intersects(function.body[1]))
+
+
+class FunctionPatchTest(unittest.TestCase):
+
+    SOURCE = utils.f("""
+    import functools
+
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args):
+            return function(*args)
+        return wrapper
+
+    x = 2 + 1
+
+    def add(x, y):
+        return x + y
+
+    class Base:
+        def add(self, x, y):
+            return x + y
+
+    class Child(Base):
+        def add(self, x, y):
+            return super().add(x, y) + 0
+
+        @staticmethod
+        def static_add(x, y):
+            return x + y
+
+        @decorate
+        def decorated_add(self, x, y):
+            return x + y
+    """)
+
+    def setUp(self):
+        self.target_ast = utils.create_ast(self.SOURCE)
+        self.module = utils.create_module(self.target_ast, 'target')
+
+    def patch_and_call(self, call):
+        results = []
+        for mutation, _ in operators.ArithmeticOperatorReplacement().mutate(self.target_ast):
+            function_patch = utils.FunctionPatch.create(self.module, [mutation])
+            if function_patch:
+                function_patch.apply(self.module)
+                results.append(call(self.module))
+                function_patch.restore()
+            else:
+                results.append(None)
+        return results
+
+    def test_patch_functions_and_methods(self):
+        results = self.patch_and_call(lambda module: (
+            module.add(5, 3),
+            module.Child().add(5, 3),
+            module.Child.static_add(5, 3),
+            module.Child().decorated_add(5, 3),
+        ))
+
+        self.assertEqual(results, [
+            None,
+            (2, 8, 8, 8),
+            (8, 2, 8, 8),
+            (8, 8, 8, 8),
+            (8, 8, 2, 8),
+            (8, 8, 8, 2),
+        ])
+
+    def test_restore_original_code(self):
+        self.patch_and_call(lambda module: None)
+
+        self.assertEqual(self.module.add(5, 3), 8)
+        self.assertEqual(self.module.Child().decorated_add(5, 3), 8)
+
+
+class NodeTypesIndexTest(unittest.TestCase):
+
+    def test_contains_any(self):
+        target_ast = utils.create_ast(utils.f("""
+        def add(x, y):
+            return x + y
+        def empty():
+            pass
+        """))
+        add_node, empty_node = target_ast.body
+        node_types = utils.NodeTypesIndex(target_ast)
+
+        self.assertTrue(node_types.contains_any(target_ast, ['Add']))
+        self.assertTrue(node_types.contains_any(add_node, ['Sub', 'Add']))
+        self.assertFalse(node_types.contains_any(empty_node, ['Add']))
+
+    def test_contains_any_if_node_not_indexed(self):
+        node_types = utils.NodeTypesIndex(utils.create_ast('pass'))
+
+        self.assertTrue(node_types.contains_any(utils.create_ast('x = 1'), ['Add']))
@@ -1,4 +1,5 @@
 import copy
+import marshal
 import sys
 import importlib
 import unittest
@@ -6,13 +7,17 @@ import time
 import pkgutil
 import inspect
 import types
-import random
 import ast
 import re
 import os
+import signal
+import subprocess
+from bisect import bisect_right
 from _pyio import StringIO
-from collections import defaultdict, namedtuple
-from multiprocessing import Process, Queue
+from collections import defaultdict, deque, namedtuple
+from multiprocessing import Pipe, Process, Queue
+from multiprocessing.connection import wait
+import threading
 from threading import Thread
 import ctypes
 from queue import Empty
@@ -20,6 +25,10 @@ from queue import Empty
 
 def create_module(ast_node, module_name='mutant', module_dict=None):
     code = compile(ast_node, module_name, 'exec')
+    return create_module_from_code(code, module_name, module_dict)
+
+
+def create_module_from_code(code, module_name='mutant', module_dict=None):
     module = types.ModuleType(module_name)
     module.__dict__.update(module_dict or {})
     exec(code, module.__dict__)
@@ -30,6 +39,112 @@ def notmutate(sth):
     return sth
 
 
+def iter_tests(tests):
+    if isinstance(tests, unittest.TestCase):
+        yield tests
+    else:
+        for test in tests:
+            yield from iter_tests(test)
+
+
+def copy_test(test):
+    if type(test).__init__ is unittest.TestCase.__init__:
+        return test.__class__(test._testMethodName)
+    return copy.copy(test)
+
+
+FUNCTION_NODES = tuple(getattr(ast, name) for name in ['FunctionDef', 'AsyncFunctionDef'] if hasattr(ast, name))
+
+
+def get_function_scope(node):
+    child, node = node, getattr(node, 'parent', None)
+    while node is not None:
+        if isinstance(node, FUNCTION_NODES) and isinstance(child, ast.stmt):
+            return node
+        child, node = node, getattr(node, 'parent', None)
+    return None
+
+
+def compile_function(function_node, module_name='mutant'):
+    node = function_node
+    path = [function_node.name]
+    while isinstance(node.parent, ast.ClassDef):
+        class_node = copy.copy(node.parent)
+        class_node.body = [node]
+        class_node.bases = []
+        class_node.keywords = []
+        class_node.decorator_list = []
+        path.insert(0, class_node.name)
+        node = class_node
+    if not isinstance(node.parent, ast.Module):
+        return None, None
+    module_node = ast.Module(body=[node])
+    module_node.type_ignores = []
+    code = compile(module_node, module_name, 'exec')
+    for name in path:
+        code = next(const for const in code.co_consts if isinstance(const, types.CodeType) and const.co_name == name)
+    return path, code
+
+
+def find_function(module, path, code):
+    namespace = module
+    for name in path[:-1]:
+        namespace = namespace.__dict__.get(name)
+        if not inspect.isclass(namespace):
+            return None
+    candidates = [namespace.__dict__.get(path[-1])]
+    while candidates:
+        candidate = candidates.pop()
+        if isinstance(candidate, (staticmethod, classmethod)):
+            candidates.append(candidate.__func__)
+        elif isinstance(candidate, property):
+            candidates += [candidate.fget, candidate.fset, candidate.fdel]
+        elif isinstance(candidate, types.FunctionType):
+            function_code = candidate.__code__
+            if (function_code.co_name, function_code.co_firstlineno) == (code.co_name, code.co_firstlineno):
+                return candidate if function_code.co_freevars == code.co_freevars else None
+            candidates.append(getattr(candidate, '__wrapped__', None))
+    return None
+
+
+class FunctionPatch:
+
+    def __init__(self, patches):
+        self.patches = patches
+        self.original_codes = []
+
+    @classmethod
+    def create(cls, module, mutations):
+        patches = []
+        for function_node in {get_function_scope(mutation.node) for mutation in mutations}:
+            if function_node is None:
+                return None
+            path, code = compile_function(function_node, module.__name__)
+            if not path or not find_function(module, path, code):
+                return None
+            patches.append((path, code))
+        return cls(patches) if patches else None
+
+    def dumps(self):
+        return marshal.dumps(self.patches)
+
+    @classmethod
+    def loads(cls, data):
+        return cls(marshal.loads(data))
+
+    def apply(self, module):
+        for path, code in self.patches:
+            function = find_function(module, path, code)
+            self.original_codes.append((function, function.__code__))
+            function.__code__ = code
+        return module
+
+    def restore(self):
+        while self.original_codes:
+            function, code = self.original_codes.pop()
+            function.__code__ = code
+
+
 class ModulesLoaderException(Exception):
 
     def __init__(self, name, exception):
@@ -42,8 +157,9 @@ class ModulesLoaderException(Exception):
 
 class ModulesLoader:
 
-    def __init__(self, names, path):
+    def __init__(self, names, path, changes=None):
         self.names = names
+        self.changes = changes
         sys.path.insert(0, path or '.')
 
     def load(self, without_modules=None):
@@ -52,8 +168,13 @@ class ModulesLoader:
         for name in self.names:
             results += self.load_single(name)
         for module, to_mutate in results:
-            if module not in without_modules:
-                yield module, to_mutate
+            if module in without_modules:
+                continue
+            if self.changes is not None:
+                to_mutate = self.changes.get(os.path.abspath(module.__file__))
+                if to_mutate is None:
+                    continue
+            yield module, to_mutate
 
     def load_single(self, name):
         if self.is_file(name):
@@ -82,14 +203,20 @@ class ModulesLoader:
         try:
             package = importlib.import_module(name)
             result = []
-            for _, module_name, ispkg in pkgutil.walk_packages(package.__path__, package.__name__ + '.'):
-                if not ispkg:
+            for module_finder, module_name, ispkg in pkgutil.walk_packages(package.__path__, package.__name__ + '.'):
+                if not ispkg and self.is_changed(module_finder, module_name):
                     module = importlib.import_module(module_name)
                     result.append((module, None))
             return result
         except ImportError as error:
             raise ModulesLoaderException(name, error)
 
+    def is_changed(self, module_finder, module_name):
+        if self.changes is None:
+            return True
+        spec = module_finder.find_spec(module_name)
+        return spec is None or os.path.abspath(spec.origin) in self.changes
+
     def load_module(self, name):
         parts = name.split('.')
         to_mutate = []
@@ -114,6 +241,99 @@ class ModulesLoader:
         return [(module, '.'.join(to_mutate) if to_mutate else None)]
 
 
+class ChangedLines:
+
+    def __init__(self, ranges=()):
+        self.ranges = []
+        for start, end in sorted(ranges):
+            if self.ranges and start <= self.ranges[-1][1] + 1:
+                self.ranges[-1] = (self.ranges[-1][0], max(end, self.ranges[-1][1]))
+            else:
+                self.ranges.append((start, end))
+        self.starts = [start for start, _ in self.ranges]
+
+    def intersects(self, node):
+        if not hasattr(node, 'lineno'):
+            return True
+        start = min([node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', [])])
+        end = getattr(node, 'end_lineno', None)
+        if end is None:
+            end = max(child.lineno for child in ast.walk(node) if hasattr(child, 'lineno'))
+        index = bisect_right(self.starts, end) - 1
+        return index >= 0 and self.ranges[index][1] >= start
+
+
+HUNK_HEADER_RE = re.compile(r'^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+HUNK_LINE_PREFIXES = ('', ' ', '-', '+', '\\')
+
+
+def parse_unified_diff(diff, root='.'):
+    ranges = defaultdict(list)
+    old_file_name = file_name = None
+    old_lines_left = new_lines_left = 0
+    lineno = 0
+    deletion = False
+    for line in diff.splitlines():
+        if (old_lines_left > 0 or new_lines_left > 0) and line[:1] in HUNK_LINE_PREFIXES:
+            if line.startswith('-'):
+                old_lines_left -= 1
+                deletion = True
+            elif line.startswith('+'):
+                new_lines_left -= 1
+                deletion = False
+                if file_name:
+                    ranges[file_name].append((lineno, lineno))
+                lineno += 1
+            elif not line.startswith('\\'):
+                old_lines_left -= 1
+                new_lines_left -= 1
+                add_deletion_point(ranges, file_name, lineno, deletion)
+                deletion = False
+                lineno += 1
+            if old_lines_left <= 0 and new_lines_left <= 0:
+                add_deletion_point(ranges, file_name, lineno, deletion)
+                deletion = False
+            continue
+        add_deletion_point(ranges, file_name, lineno, deletion)
+        old_lines_left = new_lines_left = 0
+        deletion = False
+        match = HUNK_HEADER_RE.match(line)
+        if match:
+            old_lines_left = int(match.group(1)) if match.group(1) is not None else 1
+            new_lines_left = int(match.group(3)) if match.group(3) is not None else 1
+            lineno = int(match.group(2)) + (0 if new_lines_left else 1)
+        elif line.startswith('--- '):
+            old_file_name = line[4:].split('\t')[0]
+        elif line.startswith('+++ '):
+            file_name = line[4:].split('\t')[0]
+            if file_name == '/dev/null':
+                file_name = None
+                continue
+            if file_name.startswith('b/') and (old_file_name.startswith('a/') or old_file_name == '/dev/null'):
+                file_name = file_name[2:]
+            file_name = os.path.abspath(os.path.join(root, file_name))
+    add_deletion_point(ranges, file_name, lineno, deletion)
+    return {file_name: ChangedLines(file_ranges) for file_name, file_ranges in ranges.items()}
+
+
+def add_deletion_point(ranges, file_name, lineno, deletion):
+    if deletion and file_name:
+        ranges[file_name].append((max(lineno - 1, 1), lineno))
+
+
+def get_changes(since, path=None):
+    if os.path.isfile(since):
+        with open(since) as diff_file:
+            return parse_unified_diff(diff_file.read())
+    root = subprocess.check_output(
+        ['git', 'rev-parse', '--show-toplevel'],
+        cwd=path or '.',
+        universal_newlines=True,
+    ).strip()
+    diff = subprocess.check_output(['git', 'diff', '--unified=0', since, '--'], cwd=root, universal_newlines=True)
+    return parse_unified_diff(diff, root)
+
+
 class ModuleInjector:
 
     def __init__(self, source):
@@ -204,20 +424,71 @@ SerializableMutationTestResult = namedtuple(
         'exception_traceback',
         'exception',
         'tests_run',
+        'killer_id',
     ]
 )
 
 
+class MutationTestTimeout(BaseException):
+    pass
+
+
 class MutationTestResult(unittest.TestResult):
+    MIN_ALARM_DELAY = 0.000001
 
-    def __init__(self, *args, coverage_injector=None, **kwargs):
+    def __init__(self, *args, coverage_injector=None, test_live_times=None, **kwargs):
         super(MutationTestResult, self).__init__(*args, **kwargs)
         self.type_error = None
+        self.timeout = False
         self.failfast = True
         self.coverage_injector = coverage_injector
+        self.test_live_times = test_live_times or {}
+        self.previous_alarm = None
+
+    def run_suite(self, suite):
+        try:
+            suite.run(self)
+        except MutationTestTimeout:
+            self.stop_alarm()
+            self.timeout = True
+
+    def startTest(self, test):
+        super(MutationTestResult, self).startTest(test)
+        live_time = self.test_live_times.get(test.id())
+        if live_time and self.can_set_alarm():
+            self.start_alarm(live_time)
+
+    def stopTest(self, test):
+        self.stop_alarm()
+        super(MutationTestResult, self).stopTest(test)
+
+    def can_set_alarm(self):
+        return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+    def start_alarm(self, live_time):
+        previous_timer = signal.setitimer(signal.ITIMER_REAL, 0)
+        previous_handler = signal.signal(signal.SIGALRM, self.raise_timeout)
+        self.previous_alarm = (previous_handler, previous_timer, Timer())
+        signal.setitimer(signal.ITIMER_REAL, live_time)
+
+    def stop_alarm(self):
+        if self.previous_alarm is None:
+            return
+        previous_handler, (delay, interval), timer = self.previous_alarm
+        self.previous_alarm = None
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+        if delay:
+            signal.setitimer(signal.ITIMER_REAL, max(delay - timer.stop(), self.MIN_ALARM_DELAY), interval)
+
+    def raise_timeout(self, signum, frame):
+        raise MutationTestTimeout()
 
     def addError(self, test, err):
-        if err[0] == TypeError:
+        if err[0] == MutationTestTimeout:
+            self.timeout = True
+            self.stop()
+        elif err[0] == TypeError:
             self.type_error = err
         else:
             super(MutationTestResult, self).addError(test, err)
@@ -244,7 +515,14 @@ class MutationTestResult(unittest.TestResult):
         if self.type_error:
             return self.type_error[1]
 
+    def get_killer_id(self):
+        killer = self.get_killer()
+        if killer:
+            return killer.id()
+
     def serialize(self):
+        if self.timeout:
+            return None
         return SerializableMutationTestResult(
             self.is_incompetent(),
             self.is_survived(),
@@ -252,6 +530,7 @@ class MutationTestResult(unittest.TestResult):
             str(self.get_exception_traceback()),
             self.get_exception(),
             self.testsRun - len(self.skipped),
+            self.get_killer_id(),
         )
 
 
@@ -296,24 +575,31 @@ class TimeRegister:
         cls.stack = []
 
 
-class RandomSampler:
+class TimedTestResult(unittest.TestResult):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = {}
 
-    def __init__(self, percentage):
-        self.percentage = percentage if 0 < percentage < 100 else 100
+    def startTest(self, test):
+        super().startTest(test)
+        self.test_timer = Timer()
 
-    def is_mutation_time(self):
-        return random.randrange(100) < self.percentage
+    def stopTest(self, test):
+        self.durations[test.id()] = self.test_timer.stop()
+        super().stopTest(test)
 
 
 class MutationTestRunner:
 
-    def __init__(self, suite):
+    def __init__(self, suite, test_live_times=None):
         super().__init__()
         self.suite = suite
+        self.test_live_times = test_live_times
 
     def run(self):
-        result = MutationTestResult()
-        self.suite.run(result)
+        result = MutationTestResult(test_live_times=self.test_live_times)
+        result.run_suite(self.suite)
         self.set_result(result)
 
 
@@ -358,6 +644,239 @@ class MutationTestRunnerThread(MutationTestRunner, Thread):
         return self.result.serialize()
 
 
+MutationTestTask = namedtuple(
+    'MutationTestTask', [
+        'module_name',
+        'code',
+        'test_ids',
+        'mutant_id',
+        'patch',
+    ]
+)
+
+
+def create_mutation_test_task(ast_node, module_name, test_ids=None):
+    code = compile(ast_node, module_name, 'exec')
+    return MutationTestTask(module_name, marshal.dumps(code), test_ids, None, None)
+
+
+class MutationTestWorker:
+
+    def __init__(self, handler, max_tasks=None, siblings=()):
+        self.handler = handler
+        self.max_tasks = max_tasks
+        self.siblings = siblings
+        self.process = None
+        self.connection = None
+        self.tasks_done = 0
+
+    def start(self):
+        self.connection, worker_connection = Pipe()
+        self.process = Process(target=self.serve, args=(worker_connection,))
+        self.process.start()
+        worker_connection.close()
+        self.tasks_done = 0
+
+    def serve(self, connection):
+        self.close_siblings_connections()
+        while True:
+            try:
+                task = connection.recv()
+            except EOFError:
+                break
+            if task is None:
+                break
+            connection.send(self.handler(task))
+
+    def close_siblings_connections(self):
+        for worker in self.siblings:
+            if worker.connection is not None:
+                worker.connection.close()
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def send(self, task):
+        if not self.is_alive():
+            self.restart()
+        try:
+            self.connection.send(task)
+        except OSError:
+            self.restart()
+            self.connection.send(task)
+
+    def receive(self):
+        try:
+            result = self.connection.recv()
+        except (EOFError, OSError):
+            self.restart()
+            return None
+        self.tasks_done += 1
+        if self.max_tasks and self.tasks_done >= self.max_tasks:
+            self.restart()
+        return result
+
+    def cancel(self):
+        self.restart()
+
+    def restart(self):
+        self.terminate()
+        self.start()
+
+    def terminate(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.connection.close()
+            self.connection = None
+            self.process = None
+
+    def stop(self):
+        if self.is_alive():
+            try:
+                self.connection.send(None)
+                self.process.join(1)
+            except OSError:
+                pass
+        self.terminate()
+
+
+class ForkServerWorker(MutationTestWorker):
+
+    def serve(self, connection):
+        self.close_siblings_connections()
+        while True:
+            try:
+                task = connection.recv()
+            except EOFError:
+                break
+            if task is None:
+                break
+            pid = os.fork()
+            if pid == 0:
+                self.serve_child(connection, task)
+            os.waitpid(pid, 0)
+            connection.send(None)
+
+    def serve_child(self, connection, task):
+        status = 1
+        try:
+            connection.send(os.getpid())
+            connection.send((self.handler(task),))
+            status = 0
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def send(self, task):
+        super().send(task)
+        try:
+            self.child_pid = self.connection.recv()
+        except (EOFError, OSError):
+            self.restart()
+            super().send(task)
+            self.child_pid = self.connection.recv()
+
+    def receive(self):
+        try:
+            result = self.connection.recv()
+            if result is None:
+                return None
+            self.connection.recv()
+            return result[0]
+        except (EOFError, OSError):
+            self.restart()
+            return None
+
+    def cancel(self):
+        try:
+            os.kill(self.child_pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        try:
+            while self.connection.recv() is not None:
+                pass
+        except (EOFError, OSError):
+            self.restart()
+
+
+class MutationTestWorkerPool:
+
+    def __init__(self, handler, size=1, max_tasks=None, worker_class=MutationTestWorker):
+        self.workers = []
+        for _ in range(max(size, 1)):
+            self.workers.append(worker_class(handler, max_tasks=max_tasks, siblings=self.workers))
+
+    @property
+    def size(self):
+        return len(self.workers)
+
+    def run(self, task, live_time):
+        result, _ = next(self.imap([(task, live_time)]))
+        return result
+
+    def imap(self, tasks):
+        tasks = iter(tasks)
+        idle_workers = self.workers[:]
+        busy_workers = {}
+        queued_tasks = deque()
+        results = {}
+        next_index = 0
+        next_to_yield = 0
+        exhausted = False
+        while True:
+            while not exhausted and next_index - next_to_yield < self.size:
+                try:
+                    task, live_time = next(tasks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if task is None:
+                    results[next_index] = (None, 0)
+                else:
+                    queued_tasks.append((next_index, task, live_time))
+                next_index += 1
+            while idle_workers and queued_tasks:
+                index, task, live_time = queued_tasks.popleft()
+                worker = idle_workers.pop()
+                worker.send(task)
+                busy_workers[worker] = (index, Timer(), live_time)
+            if next_to_yield in results:
+                yield results.pop(next_to_yield)
+                next_to_yield += 1
+                continue
+            if not busy_workers:
+                if exhausted:
+                    return
+                continue
+            ready_workers, expired_workers = self.wait_for_workers(busy_workers)
+            for worker in ready_workers | expired_workers:
+                index, timer, live_time = busy_workers.pop(worker)
+                duration = timer.stop()
+                if worker in ready_workers:
+                    result = worker.receive()
+                else:
+                    worker.cancel()
+                    result = None
+                results[index] = (result, duration)
+                idle_workers.append(worker)
+
+    def wait_for_workers(self, busy_workers):
+        now = Timer.time_provider()
+        timeout = max(0, min(timer.start + live_time - now for _, timer, live_time in busy_workers.values()))
+        connections = {worker.connection: worker for worker in busy_workers}
+        ready_workers = {connections[connection] for connection in wait(list(connections), timeout)}
+        now = Timer.time_provider()
+        expired_workers = {worker for worker, (_, timer, live_time) in busy_workers.items()
+                           if timer.start + live_time <= now}
+        return ready_workers, expired_workers - ready_workers
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+
+
 def get_mutation_test_runner_class():
     if os.name == 'nt':
         return MutationTestRunnerThread
@@ -367,23 +886,89 @@ def get_mutation_test_runner_class():
 
 class ParentNodeTransformer(ast.NodeTransformer):
 
+    def __init__(self):
+        super().__init__()
+        self.parent = None
+        self.last_index = 0
+
     def visit(self, node):
         if getattr(node, 'parent', None):
-            node = copy.copy(node)
-        node.parent = getattr(self, 'parent', None)
-        node.children = []
+            node = self.clean_copy(node)
+        node.parent = self.parent
+        start = self.last_index
+        self.last_index += 1
         self.parent = node
         result_node = super().visit(node)
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                for index, item in enumerate(value):
+                    if isinstance(item, ast.AST):
+                        item.parent_field = (field, index)
+            elif isinstance(value, ast.AST):
+                value.parent_field = (field, None)
+        node.interval = (start, self.last_index)
         self.parent = node.parent
-        if self.parent:
-            self.parent.children += [node] + node.children
         return result_node
 
+    @staticmethod
+    def clean_copy(node):
+        new_node = node.__class__()
+        for name in node._fields + node._attributes:
+            if hasattr(node, name):
+                setattr(new_node, name, getattr(node, name))
+        return new_node
+
+
+def is_ancestor(node, descendant):
+    try:
+        start, end = node.interval
+        return start < descendant.interval[0] < end
+    except AttributeError:
+        return False
+
+
+def is_related(node, other):
+    try:
+        start, end = node.interval
+        other_start, other_end = other.interval
+        return start < other_end and other_start < end
+    except AttributeError:
+        return False
+
+
+class NodeTypesIndex:
+
+    def __init__(self, tree):
+        self.nodes_types = {}
+        self.types_sets = {}
+        self.index(tree)
+
+    def index(self, node):
+        types = {node.__class__.__name__}
+        for child in ast.iter_child_nodes(node):
+            types.update(self.index(child))
+        types = frozenset(types)
+        types = self.types_sets.setdefault(types, types)
+        self.nodes_types[id(node)] = (node, types)
+        return types
+
+    def contains_any(self, node, type_names):
+        indexed_node, types = self.nodes_types.get(id(node), (None, None))
+        if indexed_node is not node:
+            return True
+        return not types.isdisjoint(type_names)
+
 
 def create_ast(code):
     return ParentNodeTransformer().visit(ast.parse(code))
 
 
+def create_constant(value):
+    if hasattr(ast, 'Constant'):
+        return ast.Constant(value=value)
+    return ast.NameConstant(value=value)
+
+
 def is_docstring(node):
     def_node = node.parent.parent
     return (isinstance(def_node, (ast.FunctionDef, ast.ClassDef, ast.Module)) and def_node.body and
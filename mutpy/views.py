@@ -3,7 +3,7 @@ import traceback
 import datetime
 import yaml
 import jinja2
-from mutpy import codegen, termcolor, utils
+from mutpy import codegen, termcolor, utils, operators
 
 
 class ViewNotifier:
@@ -18,6 +18,9 @@ class ViewNotifier:
     def del_view(self, views):
         self.views.remove(views)
 
+    def is_mutant_source_needed(self):
+        return any(getattr(view, 'needs_mutant_source', False) for view in self.views)
+
     def notify_all_views(self, notify, *args, **kwargs):
         for views in self.views:
             if hasattr(views, notify):
@@ -32,6 +35,12 @@ class ViewNotifier:
             raise AttributeError(name)
 
 
+def get_mutant_source(mutant):
+    if isinstance(mutant, str):
+        return mutant
+    return codegen.to_source(mutant)
+
+
 class QuietTextView:
 
     def __init__(self, colored_output=False):
@@ -76,6 +85,10 @@ class TextView(QuietTextView):
         super().__init__(colored_output)
         self.show_mutants = show_mutants
 
+    @property
+    def needs_mutant_source(self):
+        return self.show_mutants
+
     def initialize(self, targets, tests):
         self.level_print('Start mutation process:')
         self.level_print('targets: {}'.format(', '.join(targets)), 2)
@@ -84,6 +97,9 @@ class TextView(QuietTextView):
     def start(self):
         self.level_print('Start mutants generation and execution:')
 
+    def shard(self, index, count, shard_mutants, all_mutants):
+        self.level_print('shard {}/{}: {} of {} mutants'.format(index, count, shard_mutants, all_mutants), 2)
+
     def end(self, score, duration):
         super().end(score, duration)
         self.level_print('all: {}'.format(score.all_mutants), 2)
@@ -97,6 +113,17 @@ class TextView(QuietTextView):
                                                                 100 * score.incompetent_mutants / score.all_mutants), 2)
             self.level_print('timeout: {} ({:.1f}%)'.format(score.timeout_mutants,
                                                             100 * score.timeout_mutants / score.all_mutants), 2)
+            if score.equivalent_mutants:
+                self.level_print('equivalent: {} ({:.1f}%)'.format(
+                    score.equivalent_mutants, 100 * score.equivalent_mutants / score.all_mutants), 2)
+            if score.pruned_mutants:
+                self.level_print('sufficient set vs default operators: {:+d} mutants'.format(-score.pruned_mutants), 2)
+            confidence_interval = score.confidence_interval()
+            if confidence_interval:
+                self.level_print('sampled: {} of {} mutants, score 95% CI: {:.1f}% - {:.1f}%'.format(
+                    score.all_mutants, score.population_mutants, *confidence_interval), 2)
+            if score.killed_mutants:
+                self.level_print('tests run per killed mutant: {:.1f}'.format(score.tests_run_per_killed()), 2)
             if score.all_nodes:
                 self.level_print('Coverage: {} of {} AST nodes ({:.1f}%)'.format(
                     score.covered_nodes, score.all_nodes,
@@ -135,8 +162,7 @@ class TextView(QuietTextView):
                          exception.__class__.__name__, exception))
 
     def print_code(self, mutant, lineno):
-        mutant_src = codegen.to_source(mutant)
-        mutant_src = codegen.add_line_numbers(mutant_src)
+        mutant_src = codegen.add_line_numbers(get_mutant_source(mutant))
         src_lines = mutant_src.split("\n")
         lineno = min(lineno, len(src_lines))
         src_lines[lineno - 1] = self.decorate('~' + src_lines[lineno - 1][1:], 'yellow')
@@ -156,6 +182,9 @@ class TextView(QuietTextView):
     def incompetent(self, *args, **kwargs):
         self.level_print(self.time_format() + ' ' + self.decorate('incompetent', 'cyan'), continuation=True)
 
+    def equivalent(self, *args, **kwargs):
+        self.level_print(self.time_format() + ' ' + self.decorate('equivalent', 'magenta'), continuation=True)
+
 
 class DebugView:
 
@@ -173,6 +202,7 @@ class AccReportView:
 
     def __init__(self):
         self.mutation_info = []
+        self.shard_info = None
 
     def initialize(self, target, tests):
         self.target = target
@@ -181,10 +211,15 @@ class AccReportView:
         self.tests = tests
         self.number_of_tests = number_of_tests
 
+    def shard(self, index, count, shard_mutants, all_mutants):
+        self.shard_info = {'index': index, 'count': count, 'all_mutants': all_mutants}
+
     def mutation(self, number, mutations, module, mutant):
+        mutation_id = operators.get_mutations_id(module, mutations)
         mutations = [{'operator': mutation.operator.name(), 'lineno': mutation.node.lineno} for mutation in mutations]
         self.current_mutation = {
             'number': number,
+            'id': mutation_id,
             'mutations': mutations,
             'module': module,
         }
@@ -207,6 +242,9 @@ class AccReportView:
     def timeout(self, *args, **kwargs):
         self.end_mutation('timeout')
 
+    def equivalent(self, *args, **kwargs):
+        self.end_mutation('equivalent')
+
     def end_mutation(self, status, time=None, killer=None, tests_run=None, exception_traceback=None):
         self.current_mutation['status'] = status
         self.current_mutation['time'] = time
@@ -223,23 +261,29 @@ class YAMLReportView(AccReportView):
         self.file_name = file_name
 
     def end(self, score, duration):
+        report = {
+            'targets': self.target,
+            'tests': [{'name': test.__name__, 'target': target, 'time': time} for test, target, time in self.tests],
+            'number_of_tests': self.number_of_tests,
+            'mutations': self.mutation_info,
+            'total_time': duration,
+            'time_stats': dict(utils.TimeRegister.executions),
+            'mutation_score': score.count(),
+            'population_mutants': score.population_mutants,
+            'coverage': {
+                'covered_nodes': score.covered_nodes,
+                'all_nodes': score.all_nodes,
+                'modules': score.modules_coverage,
+            }
+        }
+        if self.shard_info:
+            report['shard'] = self.shard_info
         with open(self.file_name, 'w') as report_file:
-            yaml.dump({
-                'targets': self.target,
-                'tests': [{'name': test.__name__, 'target': target, 'time': time} for test, target, time in self.tests],
-                'number_of_tests': self.number_of_tests,
-                'mutations': self.mutation_info,
-                'total_time': duration,
-                'time_stats': dict(utils.TimeRegister.executions),
-                'mutation_score': score.count(),
-                'coverage': {
-                    'covered_nodes': score.covered_nodes,
-                    'all_nodes': score.all_nodes,
-                }
-            }, report_file, default_flow_style=False)
+            yaml.dump(report, report_file, default_flow_style=False)
 
 
 class HTMLReportView(AccReportView):
+    needs_mutant_source = True
 
     def __init__(self, dir_name):
         super().__init__()
@@ -257,7 +301,7 @@ class HTMLReportView(AccReportView):
         super().end_mutation(*args, **kwargs)
         template = self.env.get_template('detail.html')
         context = {
-            'mutant_code': codegen.to_source(self.current_mutation['mutant']),
+            'mutant_code': get_mutant_source(self.current_mutation['mutant']),
         }
         context.update(self.current_mutation)
         report = template.render(context)